@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Microbenchmarks of form rendering and validation.
+
+Runs offline against a dummy Pyramid registry and request, and writes
+the results as JSON, so that they can be compared between commits::
+
+    python benchmarks/run.py --output before.json
+    git checkout other-branch
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+from __future__ import print_function, unicode_literals
+import os
+import sys
+import gc
+import json
+import time
+import timeit
+import argparse
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import formencode
+from formencode import validators
+from pyramid import testing
+from pyramid.i18n import TranslationStringFactory
+
+from pyramid_webforms import Form
+from pyramid_webforms.formsets import FormSet
+
+
+_ = TranslationStringFactory('benchmarks')
+
+SIZES = (5, 50, 500)
+FORMSET_ROWS = (200, 2000)
+PARTS = ('all', 'attributes', 'fields', 'buttons', 'footer')
+OPTIONS = [('opt{}'.format(i), 'Option {}'.format(i)) for i in range(20)]
+WIDGETS = {
+    'text': lambda: {'type': 'text', 'size': 30, 'maxlength': 50,
+                     'validator': validators.UnicodeString(not_empty=True, max=50)},
+    'password': lambda: {'type': 'password', 'size': 30,
+                         'validator': validators.UnicodeString(not_empty=True, min=6)},
+    'textarea': lambda: {'type': 'textarea', 'validator': validators.UnicodeString(if_missing='')},
+    'checkbox': lambda: {'type': 'checkbox', 'selected': False, 'validator': validators.Bool()},
+    'select': lambda: {'type': 'select', 'options': OPTIONS,
+                       'validator': validators.OneOf([value for value, label in OPTIONS])},
+    'date': lambda: {'type': 'date', 'validator': validators.DateConverter(month_style='iso')},
+}
+# Valid and invalid input values by widget type
+VALID = {'text': 'value', 'password': 'secret!', 'textarea': 'text', 'checkbox': '1',
+         'select': 'opt3', 'date': '2014-01-31'}
+INVALID = {'text': '', 'password': '123', 'textarea': 'text', 'checkbox': '1',
+           'select': 'none', 'date': 'yesterday'}
+WIDGET_TYPES = sorted(WIDGETS)
+
+
+def field_names(size):
+    return ['field{}'.format(i) for i in range(size)]
+
+
+def widget_type(index):
+    return WIDGET_TYPES[index % len(WIDGET_TYPES)]
+
+
+def form_attributes(size, tips):
+    """Class attributes of a synthetic form of ``size`` fields
+    in fieldsets of up to 10 fields.
+    """
+    names = field_names(size)
+    attrs = {
+        '_id_': 'form-{}'.format(size),
+        '_submit_text_': _('Submit'),
+        '_fieldsets_': [
+            [_('Fieldset {}'.format(i)), names[i:i + 10]] for i in range(0, size, 10)
+        ],
+    }
+    for index, name in enumerate(names):
+        field = WIDGETS[widget_type(index)]()
+        field['title'] = _('Field {}'.format(index))
+        if tips:
+            field['tip'] = _('Tip of field {}'.format(index))
+        attrs[name] = field
+    return attrs
+
+
+def make_form(size, tips):
+    return type(str('Form{}{}'.format(size, tips and 'Tips' or '')), (Form,),
+                form_attributes(size, tips))
+
+
+def make_request(post=None, errors=None):
+    request = testing.DummyRequest(post=post)
+
+    class TemplateContext(object):
+        pass
+    request.tmpl_context = TemplateContext()
+    request.tmpl_context.form_errors = errors or {}
+    return request
+
+
+def input_data(size, values):
+    return dict((name, values[widget_type(index)])
+                for index, name in enumerate(field_names(size)))
+
+
+def setup_registry():
+    config = testing.setUp()
+    config.include('pyramid_webforms')
+    config.commit()
+    return config
+
+
+def measure(func, repeat, number):
+    """Best and median time per call in microseconds"""
+    func()
+    gc.collect()
+    times = sorted(t / number * 1e6 for t in timeit.repeat(func, repeat=repeat, number=number))
+    return {'best_us': times[0], 'median_us': times[len(times) // 2],
+            'repeat': repeat, 'number': number}
+
+
+def number_for(size, quick):
+    number = max(1, 2000 // size)
+    return quick and max(1, number // 10) or number
+
+
+def benchmarks(quick=False):
+    """Yield ``(name, function, number)`` of each benchmark"""
+    for size in SIZES:
+        for tips in (False, True):
+            suffix = '{}{}'.format(size, tips and '.tips' or '')
+            attrs = form_attributes(size, tips)
+            yield ('class_creation.' + suffix,
+                   lambda attrs=attrs: type(str('BenchForm'), (Form,), dict(attrs)),
+                   max(1, number_for(size, quick) // 5))
+
+            form_cls = make_form(size, tips)
+            yield ('class_inheritance.' + suffix,
+                   lambda form_cls=form_cls: type(str('BenchForm'), (form_cls,), {
+                       'extra': {'type': 'text', 'validator': validators.UnicodeString()},
+                       '_fieldsets_': form_cls._params['fieldsets'] + [[['extra']]],
+                   }),
+                   max(1, number_for(size, quick) // 5))
+            yield ('class_filter.' + suffix,
+                   lambda form_cls=form_cls, size=size: type(str('BenchForm'), (form_cls,), {
+                       '_filter_': field_names(size)[::2],
+                   }),
+                   max(1, number_for(size, quick) // 5))
+            request = make_request()
+            error_request = make_request(errors=dict(
+                (name, 'Invalid value') for name in field_names(size)[::2]))
+            for part in PARTS:
+                yield ('render.{}.{}'.format(part, suffix),
+                       lambda form_cls=form_cls, part=part: form_cls()(request, part),
+                       number_for(size, quick))
+            yield ('render.all.errors.' + suffix,
+                   lambda form_cls=form_cls: form_cls()(error_request),
+                   number_for(size, quick))
+            data = dict((name, {'value': value})
+                        for name, value in input_data(size, VALID).items())
+            yield ('render.all.data.' + suffix,
+                   lambda form_cls=form_cls, data=data: form_cls(data)(request),
+                   number_for(size, quick))
+
+        valid = make_request(post=input_data(size, VALID))
+        valid.POST['_at'] = valid.session.get_csrf_token()
+        invalid = make_request(post=input_data(size, INVALID))
+        invalid.POST['_at'] = invalid.session.get_csrf_token()
+        plain_form = make_form(size, False)
+        compiled_form = type(str('CompiledForm{}'.format(size)), (plain_form,),
+                             {'_compiled_validation_': True})
+        for prefix, form_cls in (('validate', plain_form), ('validate.compiled', compiled_form)):
+            def validate_invalid(form_cls=form_cls, request=invalid):
+                try:
+                    form_cls.validate(request)
+                except formencode.Invalid:
+                    pass
+            yield ('{}.valid.{}'.format(prefix, size),
+                   lambda form_cls=form_cls, request=valid: form_cls.validate(request),
+                   number_for(size, quick))
+            yield '{}.invalid.{}'.format(prefix, size), validate_invalid, number_for(size, quick)
+
+    formset = FormSet(make_form(len(WIDGET_TYPES), False))
+    for count in FORMSET_ROWS:
+        rows = [input_data(len(WIDGET_TYPES), VALID) for index in range(count)]
+        yield ('formset.render.{}'.format(count),
+               lambda rows=rows: formset(make_request(), rows), quick and 1 or 5)
+        post = dict(('rows-{}.{}'.format(index, name), value)
+                    for index, row in enumerate(rows) for name, value in row.items())
+        request = make_request(post=post)
+        request.POST['_at'] = request.session.get_csrf_token()
+        yield ('formset.validate.{}'.format(count),
+               lambda request=request: formset.validate(request), quick and 1 or 5)
+
+    form_cls = make_form(len(WIDGET_TYPES), True)
+    request = make_request()
+    error_request = make_request(errors=dict((name, 'Invalid value')
+                                             for name in field_names(len(WIDGET_TYPES))))
+    for index, name in enumerate(field_names(len(WIDGET_TYPES))):
+        field = form_cls._specs[name]
+        yield ('input_field.{}'.format(widget_type(index)),
+               lambda field=field: field(request), quick and 100 or 1000)
+        yield ('input_field.{}.error'.format(widget_type(index)),
+               lambda field=field: field(error_request), quick and 100 or 1000)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False, only=None):
+    setup_registry()
+    repeat = quick and 3 or 7
+    results = {}
+    for name, func, number in benchmarks(quick):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = measure(func, repeat, number)
+        print('{:<40} {:>12.1f} us'.format(name, results[name]['best_us']))
+    testing.tearDown()
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    print('\n{:<40} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline', 'current', 'ratio'))
+    for name in sorted(report['results']):
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['best_us']
+        new = report['results'][name]['best_us']
+        print('{:<40} {:>9.1f} us {:>9.1f} us {:>7.2f}x'.format(name, old, new, new / old))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations')
+    parser.add_argument('only', nargs='*', help='run the benchmarks with these name prefixes')
+    args = parser.parse_args(argv)
+
+    report = run(args.quick, args.only)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(report, json.load(baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,35 @@ from .api import form_errors
 
 def includeme(config):
     """Pyramid configuration entry point"""
-    from .api import forms_renderer_factory
+    from pyramid.settings import asbool
+    from .api import forms_renderer_factory, bind_templates, load_form_translations
+    from .validation import set_validation_threads, DEFAULT_VALIDATION_THREADS
+    from .csrf import configure_csrf
+    from .instrumentation import configure_instrumentation
     config.add_renderer('.p_wf_mako', forms_renderer_factory)
     config.add_translation_dirs('pyramid_webforms:locale/')
+    # Resolve widget templates once the renderer is registered
+    config.action(None, bind_templates, args=(config.registry,))
+    # Forms are imported by the time the configuration is committed
+    config.action(None, load_form_translations, args=(config.registry,))
+
+    configure_csrf(config.registry)
+    settings = config.registry.settings or {}
+    csrf_token_mode = config.registry.pyramid_webforms_csrf_mode
+    if csrf_token_mode == 'substitute':
+        from pyramid.tweens import INGRESS
+        # Above any tweens caching responses
+        config.add_tween('pyramid_webforms.csrf.csrf_substitution_tween_factory', under=INGRESS)
+    elif csrf_token_mode == 'fetch':
+        from .csrf import csrf_token_view, CSRF_TOKEN_ROUTE, DEFAULT_CSRF_TOKEN_PATH
+        config.add_route(CSRF_TOKEN_ROUTE, settings.get('pyramid_webforms.csrf_token_path',
+                                                        DEFAULT_CSRF_TOKEN_PATH))
+        config.add_view(csrf_token_view, route_name=CSRF_TOKEN_ROUTE)
+    set_validation_threads(int(settings.get('pyramid_webforms.validation_threads',
+                                            DEFAULT_VALIDATION_THREADS)))
+    if configure_instrumentation(config.registry) is not None:
+        config.add_tween('pyramid_webforms.instrumentation.instrumentation_tween_factory')
+    if asbool(settings.get('pyramid_webforms.warmup', False)):
+        from .warmup import warmup_forms, WARMUP_ORDER
+        # Run after the routes of the application are added
+        config.action(None, warmup_forms, args=(config.registry,), order=WARMUP_ORDER)
@@ -2,21 +2,49 @@
 from __future__ import unicode_literals
 import re
 import copy
+import json
 import inspect
+import weakref
+import datetime
+import decimal
 
 import six
 import formencode
-from webhelpers.html import literal, tags
-from pyramid.renderers import render
+from webhelpers.html import literal, tags, escape
+from pyramid.events import BeforeRender
+from pyramid.interfaces import IRendererGlobalsFactory
+from pyramid.renderers import RendererHelper
+from pyramid.settings import asbool
 from pyramid.httpexceptions import exception_response
+from pyramid.response import Response
 from pyramid.mako_templating import MakoRendererFactoryHelper
 from pyramid.i18n import get_localizer, TranslationString, TranslationStringFactory
 
+from . import instrumentation
+from .cache import LRUCache
+from .instrumentation import timed
+from .csrf import csrf_backend, multipart_token, rendered_token, csrf_token_mode, fetch_script
+from .validation import CompiledSchema, iter_validate
+from .uploads import FileUpload, parse_uploads, discard_uploads
+from .i18n import translate, load_translations
+from .options import OptionsSource, select
+from .modules import configure_module_directory
+from .errors import message_codes, error_payload, message_text
+from .client import field_rules, html_attributes
+
 
 
 _ = original_gettext = TranslationStringFactory('pyramid_webforms')
 forms_renderer_factory = MakoRendererFactoryHelper('p_wf_mako.')
 
+# Fixed strings of the forms
+SUBMIT_TEXT = _('Submit')
+OR_TEXT = _('or')
+ERROR_LABEL = _('Error')
+FORM_ERROR_MESSAGE = _('Please correct your input parameters.')
+INVALID_CSRF_MESSAGE = _('Invalid CSRF token.')
+MESSAGES = (SUBMIT_TEXT, OR_TEXT, ERROR_LABEL, FORM_ERROR_MESSAGE, INVALID_CSRF_MESSAGE)
+
 
 class FormencodeState(object):
     """"Dummy" state class for formencode"""
@@ -40,17 +68,20 @@ class PrototypeSchema(formencode.Schema):
 class CSRFTokenValidator(formencode.validators.UnicodeString):
     not_empty = True
     strip = True
+    # Results depend on the request and must never be memoized
+    uses_request = True
 
     def validate_python(self, value, state):
         super(CSRFTokenValidator, self).validate_python(value, state)
         request = state.request
-        token = request.session.get_csrf_token()
-        if token != value:
+        if not csrf_backend(request.registry).check(request, value):
             localizer = get_localizer(request)
-            raise formencode.Invalid(localizer.translate(_('Invalid CSRF token.')), value, state)
+            raise formencode.Invalid(translate(localizer, INVALID_CSRF_MESSAGE), value, state)
 
 
 CSRF_TOKEN_KEY = "_at"
+# Header carrying the CSRF token of JSON submissions
+CSRF_TOKEN_HEADER = 'X-CSRF-Token'
 CSRF_TOKEN_FIELD = {
     'type': 'hidden',
     'value': '',
@@ -65,12 +96,73 @@ csrf_detected_message = ("Cross-site request forgery detected, request denied. S
 
 def authenticated_form(request):
     submitted_token = request.POST.get(CSRF_TOKEN_KEY)
-    token = request.session.get_csrf_token()
-    return submitted_token is not None and submitted_token == token
+    if submitted_token is None:
+        return False
+    return csrf_backend(request.registry).check(request, submitted_token)
+
+
+def check_upload(request, max_size=None):
+    """Check the CSRF token of a multipart POST request reading only the head
+    of its body, and reject requests larger than ``max_size`` with 413.
+    Returns ``True`` if the token has been checked.
+    """
+    if request.method != 'POST' or request.content_type != 'multipart/form-data':
+        return False
+    if 'webob._parsed_post_vars' in request.environ:
+        # The body has been parsed already
+        return False
+    if max_size is not None and (request.content_length or 0) > max_size:
+        raise exception_response(413)
+    token = multipart_token(request, CSRF_TOKEN_KEY)
+    if token is None or not csrf_backend(request.registry).check(request, token):
+        raise exception_response(403, detail=csrf_detected_message)
+    return True
+
+
+def _json_value(value):
+    # Numbers and booleans are submitted as text, false as an unchecked checkbox
+    if isinstance(value, bool):
+        return value and 'true' or ''
+    if isinstance(value, six.integer_types + (float,)):
+        return six.text_type(value)
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
 
 
-def authenticate_form(func):
+def json_params(request):
+    """Return the JSON object of an ``application/json`` request with
+    scalars as text and the token of the ``X-CSRF-Token`` header
+    """
+    try:
+        data = request.json_body
+    except ValueError:
+        raise exception_response(400, detail='The request body is not valid JSON.')
+    if not isinstance(data, dict):
+        raise exception_response(400, detail='The request body is not a JSON object.')
+    data = dict((key, _json_value(value)) for key, value in data.items())
+    if CSRF_TOKEN_KEY not in data and CSRF_TOKEN_HEADER in request.headers:
+        data[CSRF_TOKEN_KEY] = request.headers[CSRF_TOKEN_HEADER]
+    return data
+
+
+def authenticate_form(func=None, form=None, max_size=None):
+    """View decorator rejecting POST requests without a valid CSRF token.
+    With ``form`` or ``max_size`` multipart requests are checked by
+    :func:`check_upload` first.
+    """
+    if func is None:
+        return lambda func: authenticate_form(func, form, max_size)
+    early = form is not None or max_size is not None
+    if max_size is None and form is not None:
+        max_size = form._params.get('max_request_size')
+
     def inner(context, request):
+        settings = request.registry.settings or {}
+        if early or asbool(settings.get('pyramid_webforms.early_upload_check', False)):
+            # Leave the body unparsed for Form.validate to stream the files
+            if check_upload(request, max_size):
+                return func(context, request)
         if not request.POST:
             return func(context, request)
         if authenticated_form(request):
@@ -118,8 +210,204 @@ class DeclarativeMeta(type):
         return cls
 
 
+# Keys of field definitions that aren't passed to InputField
+VALIDATION_KEYS = ('validator', 'concurrent', 'cache')
+# Class attributes of Form that aren't field definitions
+FORM_INTERNALS = frozenset(['_fields', '_hidden', '_params'])
+# Form parameters the compiled fields depend on
+FIELD_PARAMS = ('with_tip', 'client_validation')
 FORM_ATTRIBUTES_RE = re.compile("_[a-z0-9][a-z0-9_]*[a-z0-9]_", re.IGNORECASE)
 ACTION_CALL_SAME_VIEW = ''
+# Marks validation schemas that haven't been composed yet
+_NOT_COMPOSED = object()
+DEFAULT_FRAGMENT_CACHE_SIZE = 1024
+# Static fragments of forms shared by all requests
+fragment_cache = LRUCache(DEFAULT_FRAGMENT_CACHE_SIZE)
+DEFAULT_ROW_CACHE_SIZE = 4096
+# Field rows rendered with data or errors
+row_cache = LRUCache(DEFAULT_ROW_CACHE_SIZE)
+# Prefix of the parts of Form.__call__() rendering a single field row
+FIELD_PART_PREFIX = 'field:'
+
+# Widget templates, overridable with "pyramid_webforms.<name>_tpl" settings.
+TEMPLATES = {
+    'form': 'pyramid_webforms:templates/form.p_wf_mako',
+    'fieldset': 'pyramid_webforms:templates/fieldset.p_wf_mako',
+    'field': 'pyramid_webforms:templates/field.p_wf_mako',
+    'field_error': 'pyramid_webforms:templates/field_error.p_wf_mako',
+    'form_error': 'pyramid_webforms:templates/form_error.p_wf_mako',
+    'tooltip': 'pyramid_webforms:templates/tooltip.p_wf_mako',
+    'submit': 'pyramid_webforms:templates/submit.p_wf_mako',
+    'submit_alternate': 'pyramid_webforms:templates/submit_alternate.p_wf_mako',
+    'formset': 'pyramid_webforms:templates/formset.p_wf_mako',
+    'formset_row': 'pyramid_webforms:templates/formset_row.p_wf_mako',
+}
+
+
+class FormTemplates(object):
+    """Widget templates of the forms resolved once for a registry"""
+    def __init__(self, registry):
+        settings = registry.settings or {}
+        reload_templates = settings.get('pyramid.reload_templates', None)
+        if reload_templates is None:
+            reload_templates = settings.get('reload_templates', False)
+        reload_templates = asbool(reload_templates)
+        self.registry = registry
+        self.render_plans = asbool(settings.get('pyramid_webforms.render_plans', True))
+        self.fragment_cache_size = int(settings.get('pyramid_webforms.fragment_cache_size',
+                                                    DEFAULT_FRAGMENT_CACHE_SIZE))
+        self.row_cache_size = int(settings.get('pyramid_webforms.row_cache_size',
+                                               DEFAULT_ROW_CACHE_SIZE))
+        self.globals_factory = registry.queryUtility(IRendererGlobalsFactory)
+        module_directory = settings.get('pyramid_webforms.module_directory')
+        if module_directory:
+            configure_module_directory(registry, module_directory, TEMPLATES['form'])
+        self.paths = {}
+        self.helpers = {}
+        self.templates = {}
+        for name, default in TEMPLATES.items():
+            path = settings.get('pyramid_webforms.{}_tpl'.format(name), default)
+            helper = RendererHelper(name=path, registry=registry)
+            self.paths[name] = path
+            self.helpers[name] = helper
+            # Non-mako renderers are called as usual
+            implementation = getattr(helper.renderer, 'implementation', None)
+            if implementation is None or reload_templates:
+                self.templates[name] = None
+            else:
+                self.templates[name] = implementation()
+
+    def render(self, request, name, value):
+        helper = self.helpers[name]
+        system = BeforeRender({
+            'view': None,
+            'renderer_name': helper.name,
+            'renderer_info': helper,
+            'context': getattr(request, 'context', None),
+            'request': request,
+            'req': request,
+        }, value)
+        if self.globals_factory is not None:
+            renderer_globals = self.globals_factory(system)
+            if renderer_globals:
+                system.update(renderer_globals)
+        self.registry.notify(system)
+
+        template = self.templates[name]
+        if template is None:
+            return helper.renderer(value, system)
+        # see pyramid.mako_templating.MakoLookupTemplateRenderer
+        context = system.pop('context', None)
+        if context is not None:
+            system['_context'] = context
+        system.update(value)
+        return template.render_unicode(**system)
+
+
+def form_templates(registry):
+    """Return :class:`FormTemplates` of the registry, binding them on first use"""
+    templates = getattr(registry, 'pyramid_webforms_templates', None)
+    if templates is None:
+        templates = bind_templates(registry)
+    return templates
+
+
+def bind_templates(registry):
+    templates = registry.pyramid_webforms_templates = FormTemplates(registry)
+    fragment_cache.resize(templates.fragment_cache_size)
+    row_cache.resize(templates.row_cache_size)
+    return templates
+
+
+def form_classes():
+    """Return all subclasses of :class:`Form` defined so far"""
+    classes = Form.__subclasses__()
+    for form_cls in classes:
+        classes.extend(cls for cls in form_cls.__subclasses__() if cls not in classes)
+    return classes
+
+
+def load_form_translations(registry):
+    """Translate the fixed strings and the strings of all forms into the
+    lookup tables of the ``pyramid_webforms.locales`` localizers.
+    """
+    strings = list(MESSAGES)
+    for form_cls in form_classes():
+        strings.extend(form_cls.translation_strings())
+    load_translations(registry, strings)
+
+
+def _cached_fragment(key, cache=fragment_cache, kind='fragment_cache'):
+    fragment = cache.get(key)
+    active = instrumentation.collector
+    if active is not None:
+        active.incr(kind, '{}.{}'.format(
+            key[0].form_cls.__name__, fragment is None and 'miss' or 'hit'))
+    return fragment
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+# Values that render the same as long as they are equal
+_IMMUTABLE_TYPES = six.string_types + six.integer_types + (
+    float, bool, type(None), decimal.Decimal, datetime.date, datetime.time, datetime.timedelta)
+
+
+def _freeze(value):
+    """Return a hashable key of field data, telling apart equal values
+    that render differently
+    """
+    if isinstance(value, TranslationString):
+        return (TranslationString, six.text_type(value), value.domain, value.context,
+                value.default, _freeze(value.mapping))
+    if isinstance(value, dict):
+        return (dict, tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_freeze(item) for item in value)
+        return (type(value), isinstance(value, (set, frozenset)) and frozenset(items) or items)
+    if isinstance(value, OptionsSource):
+        return (OptionsSource, id(value))
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return (type(value), value)
+    raise _Uncacheable()
+
+
+def _render(request, name, value):
+    return form_templates(request.registry).render(request, name, value)
+
+
+# Passed to templates in place of dynamic values, twice to detect
+# templates that don't just substitute them
+_PROBE = '@@pwf:{}:{}@@'
+_PROBE_RE = re.compile('@@pwf:0:([a-z0-9_]+)@@')
+
+
+def _compile_segments(render_fn, slots):
+    """Split the output of ``render_fn`` into ``(text, slot, ..., text)``
+    segments, or return ``None`` if it can't be filled by substitution
+    """
+    probes = [
+        dict((slot, literal(_PROBE.format(n, slot))) for slot in slots)
+        for n in (0, 1)
+    ]
+    output = render_fn(probes[0])
+    reference = output
+    for slot in slots:
+        reference = reference.replace(probes[0][slot], probes[1][slot])
+    if reference != render_fn(probes[1]):
+        return None
+    segments = tuple(_PROBE_RE.split(output))
+    if set(segments[1::2]) != set(slots):
+        return None
+    return segments
+
+
+def _fill_segments(segments, values):
+    output = list(segments)
+    output[1::2] = [values[slot] for slot in segments[1::2]]
+    return ''.join(output)
 
 
 class Form(object):
@@ -135,15 +423,22 @@ class Form(object):
     Invalid = formencode.Invalid
 
     def __classinit__(self, new_attrs):
-        self._fields = copy.copy(self._fields)
-        self._hidden = copy.copy(self._hidden)
-        # We should create deepcopy here because we have nested
-        # mutable objects inside _params.
-        self._params = copy.deepcopy(self._params)
-
+        parent_fields = self._fields
+        parent_hidden = self._hidden
+        parent_specs = getattr(self, '_specs', {})
+        parent_params = self._params
+        # Nested values of _params are replaced rather than modified,
+        # so they are shared with the parent class.
+        self._params = dict(self._params)
+        # Render plans are compiled lazily per locale and templates set.
+        self._render_plans = {}
+
+        fields = {}
+        hidden = {}
         for name, val in new_attrs.items():
             if (name.startswith('__') or inspect.ismethod(val) or
-                isinstance(val, classmethod) or val is formencode.Invalid):
+                inspect.isfunction(val) or isinstance(val, classmethod) or
+                val is formencode.Invalid or name in FORM_INTERNALS):
                 continue
 
             elif FORM_ATTRIBUTES_RE.match(name):
@@ -154,38 +449,73 @@ class Form(object):
 
             else:
                 if val.get('type') == 'hidden':
-                    self._hidden[name] = val
+                    hidden[name] = val
                 else:
-                    self._fields[name] = val
+                    fields[name] = val
+
+        # Field mappings are copied only if they change
+        filtered = set(self._params['filter'])
+        if fields or filtered:
+            self._fields = dict(parent_fields)
+            self._fields.update(fields)
+        if hidden or filtered:
+            self._hidden = dict(parent_hidden)
+            self._hidden.update(hidden)
 
         # Remove filtered fields
-        for item in self._params['filter']:
-            try:
-                self._fields.pop(item)
-            except KeyError:
-                self._hidden.pop(item)
-
-            for fieldset in self._params['fieldsets']:
-                new_fields_list = []
-                for idx, field in enumerate(fieldset['fields']):
-                    if field != item:
-                        new_fields_list.append(field)
-                fieldset['fields'] = new_fields_list
+        if filtered:
+            for item in filtered:
+                try:
+                    self._fields.pop(item)
+                except KeyError:
+                    self._hidden.pop(item)
+            self._params['fieldsets'] = [
+                dict(fieldset, fields=[field for field in fieldset['fields']
+                                       if field not in filtered])
+                for fieldset in self._params['fieldsets']
+            ]
             # Clear cls._params['filter'] in order to properly handle
-        # inheritance of filtered forms (otherwise
-        # cls._fields.pop(item) will raise KeyError on inherited forms).
-        self._params['filter'] = []
+            # inheritance of filtered forms (otherwise
+            # cls._fields.pop(item) will raise KeyError on inherited forms).
+            self._params['filter'] = []
 
         # Add CSRF token field to all POST forms
         if self._params.get('method', 'post') == 'post':
             if CSRF_TOKEN_KEY not in self._hidden:
+                if self._hidden is parent_hidden:
+                    self._hidden = dict(parent_hidden)
                 self._hidden[CSRF_TOKEN_KEY] = CSRF_TOKEN_FIELD
-        else:
-            if CSRF_TOKEN_KEY in self._hidden:
-                del self._hidden[CSRF_TOKEN_KEY]
-
-        # Generate validation schema
-        self._params['validation_schema'] = self._compose_validator()
+        elif CSRF_TOKEN_KEY in self._hidden:
+            if self._hidden is parent_hidden:
+                self._hidden = dict(parent_hidden)
+            del self._hidden[CSRF_TOKEN_KEY]
+
+        # Compile field definitions, reusing the ones of the parent class
+        if any(self._params.get(key) != parent_params.get(key) for key in FIELD_PARAMS):
+            parent_specs = {}
+        self._specs = {}
+        for name, field in self._fields.items():
+            spec = parent_specs.get(name)
+            if spec is None or parent_fields.get(name) is not field:
+                spec = InputField(name=name, form_name=self.__name__, **self._field_values(name))
+            self._specs[name] = spec
+
+        # Validation schemas are composed on first use
+        self._chained_validators = self._params.pop('chained_validators', [])
+        self._params['validation_schema'] = None
+        self._compiled_schema = _NOT_COMPOSED
+        self._row_validator_cache = None
+        self._timed_schema = None
+        self._error_codes = None
+        self._client_rules = {}
+        # File fields streamed by validate()
+        self._uploads = {}
+        for name, field in self._fields.items():
+            validator = field.get('validator')
+            if isinstance(validator, type) and issubclass(validator, FileUpload):
+                validator = validator()
+            if isinstance(validator, FileUpload):
+                self._uploads[name] = validator
 
 
     @classmethod
@@ -221,86 +551,302 @@ class Form(object):
                 schema.add_field(name, validator)
 
         # Add chained validators if needed
-        chained_validators = cls._params.pop('chained_validators', [])
-        for validator in chained_validators:
+        for validator in cls._chained_validators:
             schema.add_chained_validator(validator)
         return schema
 
 
     @classmethod
-    def validate(cls, request, state=None):
-        if cls._params['method'] == 'post':
-            data = request.POST
-        elif cls._params['method'] == 'get':
-            data = request.GET
-        else:
-            data = request.params
+    def _schema(cls):
+        """Return the validation schema of the form, composing it on first use"""
+        schema = cls._params['validation_schema']
+        if schema is None:
+            schema = cls._params['validation_schema'] = cls._compose_validator()
+        return schema
+
 
+    @classmethod
+    def _compiled(cls):
+        """Return the :class:`CompiledSchema` of forms with compiled validation,
+        concurrent or memoized fields, or ``None``.
+        """
+        compiled = cls._compiled_schema
+        if compiled is _NOT_COMPOSED:
+            concurrent = cls._field_options('concurrent')
+            memoize = cls._field_options('cache')
+            compiled = None
+            if cls._params.get('compiled_validation') or concurrent or memoize:
+                compiled = CompiledSchema(cls._schema(), concurrent, memoize, name=cls.__name__)
+            cls._compiled_schema = compiled
+        return compiled
+
+
+    @classmethod
+    def _field_options(cls, key):
+        """Map names of the fields that set the validation option ``key``
+        (``'concurrent'`` or ``'cache'``) to its value.
+        """
+        return dict(
+            (name, field[key]) for fields in (cls._fields, cls._hidden)
+            for name, field in fields.items() if field.get(key)
+        )
+
+
+    @classmethod
+    def validator_cache_stats(cls):
+        """Hit/miss counters of the memoized field validators by field name"""
+        compiled = cls._compiled()
+        if compiled is None:
+            return {}
+        return compiled.memo_stats()
+
+
+    @classmethod
+    @timed('validate', lambda cls, request, state=None: cls.__name__)
+    def validate(cls, request, state=None):
         if state is None:
             state = FormencodeState(request=request)
 
-        data = cls._params['validation_schema'].to_python(data, state)
+        data = parsed = None
+        if cls._uploads and cls._params['method'] == 'post':
+            # Stream files instead of letting WebOb buffer the body
+            data = parsed = parse_uploads(request, cls._uploads, state)
+        if data is None and cls._params['method'] != 'get' and \
+                getattr(request, 'content_type', None) == 'application/json':
+            data = json_params(request)
+            schema = cls._schema()
+            # Objects are never field values, lists only of list validators
+            errors = dict(
+                (name, formencode.Invalid(schema.message('singleValueExpected', state), value, state))
+                for name, value in data.items()
+                if isinstance(value, dict) or (isinstance(value, list) and name in schema.fields
+                                               and not schema.fields[name].accept_iterator)
+            )
+            if errors:
+                raise formencode.Invalid(
+                    formencode.schema.format_compound_error(errors), data, state,
+                    error_dict=errors)
+        if data is None:
+            if cls._params['method'] == 'post':
+                data = request.POST
+            elif cls._params['method'] == 'get':
+                data = request.GET
+            else:
+                data = request.params
+
+        schema = cls._compiled()
+        if schema is None:
+            schema = cls._schema()
+            if instrumentation.collector is not None:
+                # Compiled schemas record durations of field validators
+                if cls._timed_schema is None:
+                    cls._timed_schema = CompiledSchema(schema, name=cls.__name__)
+                schema = cls._timed_schema
+        try:
+            data = schema.to_python(data, state)
+        except formencode.Invalid:
+            if parsed is not None:
+                discard_uploads(parsed)
+            raise
         return data
 
 
+    @classmethod
+    def error_payload(cls, request, error):
+        """Return the errors of :meth:`validate` as a JSON-serializable dict"""
+        codes = cls._error_codes
+        if codes is None:
+            codes = cls._error_codes = message_codes(cls._schema())
+        order = {}
+        for fieldset in cls._params['fieldsets']:
+            for name in fieldset['fields']:
+                order.setdefault(name, len(order))
+        return error_payload(get_localizer(request), error, codes, order, FORM_ERROR_MESSAGE)
+
+
+    @classmethod
+    def error_response(cls, request, error, status=400):
+        """Return a JSON response of :meth:`error_payload` for
+        forms submitted with XHR.
+        """
+        body = json.dumps(cls.error_payload(request, error)).encode('utf-8')
+        return Response(body, status=status, content_type='application/json', charset='utf-8')
+
+
+    @classmethod
+    def client_rules(cls, request=None):
+        """Return the client-side validation rules of the fields as a
+        JSON-serializable dict, cached per locale
+        """
+        localizer = request is not None and get_localizer(request) or None
+        key = localizer is not None and localizer.locale_name or None
+        document = cls._client_rules.get(key)
+        if document is None:
+            document = {'fields': {}, 'unsupported': {}}
+            if localizer is not None:
+                document['messages'] = {}
+                state = FormencodeState(request=request)
+            for name, field in cls._fields.items():
+                rules = field_rules(field)
+                if rules.rules:
+                    document['fields'][name] = rules.rules
+                    if localizer is not None:
+                        document['messages'][name] = rules.messages(
+                            lambda msg: message_text(localizer, msg), state)
+                if rules.unsupported:
+                    document['unsupported'][name] = rules.unsupported
+            cls._client_rules[key] = document
+        return document
+
+
+    @classmethod
+    def validate_many(cls, rows, state=None, workers=None, chunksize=100):
+        """Validate an iterable of dicts without a request, yielding
+        ``(index, result)`` pairs; ``workers`` > 1 use a process pool
+        """
+        if state is None:
+            state = FormencodeState()
+        return iter_validate(cls, rows, state, workers, chunksize)
+
+
+    @classmethod
+    def _row_validator(cls):
+        """Validator of :meth:`validate_many`: the validation schema
+        of the form without the CSRF token field.
+        """
+        validator = cls._row_validator_cache
+        if validator is None:
+            schema = cls._schema()
+            if CSRF_TOKEN_KEY in schema.fields:
+                row_schema = PrototypeSchema()
+                for name, field_validator in schema.fields.items():
+                    if name != CSRF_TOKEN_KEY:
+                        row_schema.add_field(name, field_validator)
+                for chained_validator in schema.chained_validators:
+                    row_schema.add_chained_validator(chained_validator)
+                schema = row_schema
+            if cls._compiled() is not None:
+                validator = CompiledSchema(schema, cls._field_options('concurrent'),
+                                           cls._field_options('cache'), name=cls.__name__)
+            else:
+                validator = schema
+            cls._row_validator_cache = validator
+        return validator
+
+
     def __init__(self, data=None):
         if data is None:
             data = {}
+        # Instances are shared by concurrent requests
         self.data = data
-        self._cached_parts = {}
 
 
+    @timed('render', lambda self, request, part='all': '{}.{}'.format(type(self).__name__, part))
     def __call__(self, request, part='all'):
-        localizer = get_localizer(request)
-        # Explicitly add CSRF token value to data dict if form is POST
-        if self._params.get('method', 'post') == 'post':
-            self.data[CSRF_TOKEN_KEY] = {'value': request.session.get_csrf_token()}
-            # Prepare buttons
-        if self._cached_parts.get('buttons') is None:
-            alternate_url = self._params.get('alternate_url', '')
-            if alternate_url:
-                if isinstance(alternate_url, dict):
-                    url_kw = copy.copy(alternate_url)
-                    name = url_kw.pop('name', None)
-                    alternate_url = request.route_path(name, **url_kw)
-
-                template_path = request.registry.settings.get(
-                    'pyramid_webforms.submit_alternate_tpl',
-                    'pyramid_webforms:templates/submit_alternate.p_wf_mako'
-                )
-                submit_btn = render(
-                    template_path,
-                    {
-                        'form_submit_text': self._params.get('submit_text', localizer.translate(_('Submit'))),
-                        'form_or_text': self._params.get('or_text', localizer.translate(_('or'))),
-                        'form_alternate_url': alternate_url,
-                        'form_alternate_text': self._params.get('alternate_text', '')
-                    },
-                    request
-                )
+        if part.startswith(FIELD_PART_PREFIX):
+            localizer = get_localizer(request)
+            plan = self._render_plan(request, localizer)
+            return self._field_row(request, plan, part[len(FIELD_PART_PREFIX):])
+        context = self._render_context(request)
+        parts = self._prepare_parts(request, context)
+
+        if part == 'attributes':
+            return parts['attributes']
+        elif part == 'fields':
+            return parts['fields']
+        elif part == 'buttons':
+            return parts['buttons']
+        elif part == 'footer':
+            return parts['footer']
+        else:
+            # part == 'all'
+            parts = {
+                'form_attributes': parts['attributes'],
+                'form_fields': parts['fields'],
+                'form_buttons': parts['buttons'],
+                'form_footer': parts['footer']
+            }
+            plan = context.plan
+            if plan is None or plan.form is None or not parts['form_fields']:
+                return self._render_form(request, parts)
+            return literal(_fill_segments(plan.form, parts))
+
+    def iterate(self, request):
+        """Render the form as an iterable of HTML chunks: the attributes,
+        each fieldset, the buttons and the footer
+        """
+        context = self._render_context(request)
+        plan = context.plan
+        if plan is None or plan.form is None or not plan.fieldsets:
+            yield self(request)
+            return
+        parts = self._prepare_parts(request, context, fields=False)
+        for idx, item in enumerate(plan.form):
+            if not idx % 2:
+                if item:
+                    yield literal(item)
+            elif item != 'form_fields':
+                yield parts[item[len('form_'):]]
+            elif parts.get('fields') is not None:
+                yield parts['fields']
             else:
-                template_path = request.registry.settings.get(
-                    'pyramid_webforms.submit_tpl',
-                    'pyramid_webforms:templates/submit.p_wf_mako'
-                )
-                submit_btn = render(
-                    template_path,
-                    {'form_submit_text': self._params.get('submit_text', localizer.translate(_('Submit')))},
-                    request
-                )
-            self._cached_parts['buttons'] = literal(submit_btn)
+                for chunk in plan.iter_fields(request, self.data):
+                    yield chunk
+
+    def _render_context(self, request):
+        """Return the :class:`_RenderContext` of the form kept on ``request``"""
+        contexts = getattr(request, '_pwf_render_contexts', None)
+        if contexts is None:
+            # Forms created and rendered in a loop don't pile up
+            contexts = request._pwf_render_contexts = weakref.WeakKeyDictionary()
+        context = contexts.get(self)
+        if context is None:
+            localizer = get_localizer(request)
+            context = contexts[self] = _RenderContext(
+                localizer, self._render_plan(request, localizer))
+        return context
+
+    def _prepare_parts(self, request, context, fields=True):
+        parts = context.parts
+        localizer = context.localizer
+        plan = context.plan
+        # Explicitly add CSRF token value to the data of hidden fields if form is POST
+        token = context.token
+        if token is None and self._params.get('method', 'post') == 'post':
+            token = context.token = rendered_token(request)
+            # Prepare buttons
+        if parts.get('buttons') is None:
+            parts['buttons'] = self._buttons(request, localizer, plan)
 
         # Prepare fields
-        if self._cached_parts.get('fields') is None:
-            output = []
-            for fields in self._params['fieldsets']:
-                output.append(self._generate_fields(request, fields, self.data))
-            self._cached_parts['fields'] = literal(''.join(output))
+        if fields and parts.get('fields') is None:
+            if plan is None:
+                output = []
+                for fields in self._params['fieldsets']:
+                    output.append(self._generate_fields(request, fields, self.data))
+                parts['fields'] = literal(''.join(output))
+            elif (request.tmpl_context.form_errors
+                  or any(name in self._fields for name in self.data)):
+                parts['fields'] = plan.render_fields(request, self.data)
+            else:
+                # Fields with empty data are the same for all requests,
+                # unless options are loaded by callables
+                key = (plan, 'fields')
+                fields = _cached_fragment(key)
+                if fields is None:
+                    fields = plan.render_fields(request, self.data)
+                    if all(row.cacheable for row in plan.rows.values()):
+                        fragment_cache.set(key, fields)
+                parts['fields'] = fields
 
         # Prepare form attributes
-        if self._cached_parts.get('attributes') is None:
+        if parts.get('attributes') is None:
+            data = self.data
+            if token is not None:
+                data = dict(data)
+                data[CSRF_TOKEN_KEY] = {'value': token}
             # try to get action url from instance data
-            action = self.data.get('_action_')
+            action = data.get('_action_')
             if action is None:
                 action_params = self._params.get('action', {})
                 if action_params:
@@ -310,69 +856,188 @@ class Form(object):
                 else:
                     action = ACTION_CALL_SAME_VIEW
 
-            hidden_fields = []
-            for name, data in self._hidden.items():
-                value = self.data.get(name, {}).get('value', data.get('value'))
-                hidden_fields.append(tags.__dict__['hidden'](name, value))
-
-            self._cached_parts['attributes'] = literal('{}{}'.format(
-                _secure_form(
-                    action,
-                    id=self._params.get('id'),
-                    class_=self._params.get('class'),
-                    method=self._params.get('method', 'post'),
-                    multipart=self._params.get('multipart'),
-                    target=self._params.get('target'),
-                    style=self._params.get('style'),
-                    **self._params.get('html5_attrs', {})
-                ),
-                ''.join(hidden_fields)
-            ))
+            if plan is None or any(name != CSRF_TOKEN_KEY and name in self._hidden
+                                   for name in data):
+                attributes = self._render_attributes(action, data)
+            else:
+                # The CSRF token is substituted into the cached attributes
+                key = (plan, 'attributes', action)
+                segments = _cached_fragment(key)
+                if segments is None:
+                    segments = _compile_segments(
+                        lambda slots: self._render_attributes(
+                            action, {CSRF_TOKEN_KEY: {'value': slots.get('csrf_token')}}),
+                        ('csrf_token',) if token is not None else ()
+                    )
+                    # False marks attributes that cannot be compiled
+                    segments = segments or False
+                    fragment_cache.set(key, segments)
+                if not segments:
+                    attributes = self._render_attributes(action, data)
+                else:
+                    attributes = _fill_segments(segments, {'csrf_token': escape(token)})
+            parts['attributes'] = literal(attributes)
 
         # Prepare form footer
-        if self._cached_parts.get('footer') is None:
-            self._cached_parts['footer'] = literal('</form>')
-
-        if part == 'attributes':
-            return self._cached_parts['attributes']
-        elif part == 'fields':
-            return self._cached_parts['fields']
-        elif part == 'buttons':
-            return self._cached_parts['buttons']
-        elif part == 'footer':
-            return self._cached_parts['footer']
+        if parts.get('footer') is None:
+            footer = '</form>'
+            if token is not None and csrf_token_mode(request.registry) == 'fetch':
+                footer += fetch_script(request, CSRF_TOKEN_KEY)
+            parts['footer'] = literal(footer)
+        return parts
+
+    def _field_row(self, request, plan, name):
+        """Render the row of a single field with the instance data and errors"""
+        if name not in self._specs:
+            raise FieldError('Form {} has no field "{}"'.format(type(self).__name__, name))
+        row = plan is not None and plan.rows.get(name) or None
+        if row is None:
+            return literal(self._specs[name].override(self.data.get(name))(request))
+        return literal(row(request, self.data, request.tmpl_context.form_errors))
+
+    def _buttons(self, request, localizer, plan):
+        alternate_url = self._params.get('alternate_url', '')
+        if alternate_url:
+            if isinstance(alternate_url, dict):
+                url_kw = copy.copy(alternate_url)
+                name = url_kw.pop('name', None)
+                alternate_url = request.route_path(name, **url_kw)
+
+        if plan is not None:
+            key = (plan, 'buttons', alternate_url)
+            submit_btn = _cached_fragment(key)
+            if submit_btn is not None:
+                return submit_btn
+
+        if alternate_url:
+            submit_btn = _render(
+                request,
+                'submit_alternate',
+                {
+                    'form_submit_text': self._params.get('submit_text', translate(localizer, SUBMIT_TEXT)),
+                    'form_or_text': self._params.get('or_text', translate(localizer, OR_TEXT)),
+                    'form_alternate_url': alternate_url,
+                    'form_alternate_text': self._params.get('alternate_text', '')
+                }
+            )
         else:
-            # part == 'all'
-            template_path = request.registry.settings.get(
-                'pyramid_webforms.form_tpl',
-                'pyramid_webforms:templates/form.p_wf_mako'
+            submit_btn = _render(
+                request,
+                'submit',
+                {'form_submit_text': self._params.get('submit_text', translate(localizer, SUBMIT_TEXT))}
             )
-            return literal(
-                render(
-                    template_path,
-                    {
-                        'form_attributes': self._cached_parts['attributes'],
-                        'form_fields': self._cached_parts['fields'],
-                        'form_buttons': self._cached_parts['buttons'],
-                        'form_footer': self._cached_parts['footer']
-                    },
-                    request
-                )
+        submit_btn = literal(submit_btn)
+        if plan is not None:
+            fragment_cache.set(key, submit_btn)
+        return submit_btn
+
+    def _render_attributes(self, action, data):
+        hidden_fields = []
+        hidden = self._hidden.items()
+        if self._params.get('multipart'):
+            # The token goes first for check_upload() to find it early
+            hidden = sorted(hidden, key=lambda item: item[0] != CSRF_TOKEN_KEY)
+        for name, field in hidden:
+            value = data.get(name, {}).get('value', field.get('value'))
+            hidden_fields.append(tags.__dict__['hidden'](name, value))
+
+        return '{}{}'.format(
+            _secure_form(
+                action,
+                id=self._params.get('id'),
+                class_=self._params.get('class'),
+                method=self._params.get('method', 'post'),
+                multipart=self._params.get('multipart'),
+                target=self._params.get('target'),
+                style=self._params.get('style'),
+                **self._params.get('html5_attrs', {})
+            ),
+            ''.join(hidden_fields)
+        )
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop render plans and cached fragments of the form
+        and its subclasses, e.g. after overriding the templates.
+        """
+        classes = [cls]
+        for klass in classes:
+            klass._render_plans.clear()
+            classes.extend(klass.__subclasses__())
+        fragment_cache.invalidate(lambda key: issubclass(key[0].form_cls, cls))
+        row_cache.invalidate(lambda key: issubclass(key[0].form_cls, cls))
+
+    @classmethod
+    def cache_stats(cls):
+        """Hit/miss counters of the fragment cache shared by all forms"""
+        return fragment_cache.stats()
+
+    @classmethod
+    def translation_strings(cls):
+        """Translatable strings of the form: button texts, fieldset names,
+        and titles and tips of the fields.
+        """
+        values = [cls._params.get(key) for key in ('submit_text', 'or_text', 'alternate_text')]
+        values.extend(fieldset.get('name') for fieldset in cls._params['fieldsets'])
+        for fields in (cls._fields, cls._hidden):
+            for field in fields.values():
+                values.extend(field.values())
+        return [value for value in values if isinstance(value, TranslationString)]
+
+    @classmethod
+    def _render_plan(cls, request, localizer):
+        """Return the :class:`RenderPlan` of the form for the current locale,
+        or ``None`` if render plans are disabled
+        """
+        templates = form_templates(request.registry)
+        if not templates.render_plans:
+            return None
+        key = (localizer.locale_name, templates)
+        plan = cls._render_plans.get(key)
+        if plan is None:
+            plan = cls._render_plans[key] = RenderPlan(cls, request)
+        return plan
+
+    @classmethod
+    def _render_form(cls, request, parts):
+        return literal(_render(request, 'form', parts))
+
+    @classmethod
+    def _render_fieldset(cls, request, title, fields_html):
+        return literal(
+            _render(
+                request,
+                'fieldset',
+                {
+                    'fieldset_title': title,
+                    'fieldset_fields': fields_html
+                }
             )
+        )
+
+    @classmethod
+    def _field_values(cls, name):
+        values = {'with_tip':cls._params.get('with_tip', True)}
+        values.update(cls._fields[name])
+        for key in VALIDATION_KEYS:
+            values.pop(key, None)
+        if cls._params.get('client_validation'):
+            field = cls._fields[name]
+            attributes = html_attributes(field, field_rules(field))
+            # Attributes set in the field definition take precedence
+            for key in ('required', 'maxlength'):
+                if values.get(key) is not None:
+                    attributes.pop(key, None)
+            attributes.update(values.get('html5_attrs') or {})
+            values['html5_attrs'] = attributes
+        return values
 
     @classmethod
+    @timed('fieldset', lambda cls, request, fields_list, override_data: cls.__name__)
     def _generate_fields(self, request, fields_list, override_data):
         html = []
         for name in fields_list['fields']:
-            field = self._fields[name]
-
-            values = {'with_tip':self._params.get('with_tip', True)}
-            values.update(field)
-            data = override_data.get(name, {})
-            values.update(data)
-
-            values.pop('validator', None)
-            input = InputField(name=name, **values)
+            input = self._specs[name].override(override_data.get(name))
             html.append(input(request))
 
         # Don't show empty fieldsets
@@ -380,43 +1045,227 @@ class Form(object):
             return ''
 
         title = fields_list.get('name', '')
-        template_path = request.registry.settings.get(
-            'pyramid_webforms.fieldset_tpl',
-            'pyramid_webforms:templates/fieldset.p_wf_mako'
+        return self._render_fieldset(request, title, literal(''.join(html)))
+
+
+class _RenderContext(object):
+    """State of rendering a form instance for a single request:
+    the localizer, the render plan, the CSRF token and the rendered parts.
+    """
+    __slots__ = ('localizer', 'plan', 'token', 'parts')
+
+    def __init__(self, localizer, plan):
+        self.localizer = localizer
+        self.plan = plan
+        self.token = None
+        self.parts = {}
+
+
+class RenderPlan(object):
+    """Static HTML segments of the rows and fieldsets of a form class
+    for a single locale
+    """
+    def __init__(self, form_cls, request):
+        self.form_cls = form_cls
+        # Each fieldset is a list of static text and callable rows
+        self.fieldsets = []
+        # Compiled rows by field name
+        self.rows = {}
+        for fieldset in form_cls._params['fieldsets']:
+            self._compile_fieldset(request, fieldset)
+        self.form = _compile_segments(
+            lambda parts: form_cls._render_form(request, parts),
+            ('form_attributes', 'form_fields', 'form_buttons', 'form_footer')
         )
-        return literal(
-            render(
-                template_path,
-                {
-                    'fieldset_title': title,
-                    'fieldset_fields': literal(''.join(html))
-                },
-                request
-            )
+
+    def _compile_fieldset(self, request, fieldset):
+        rows = []
+        for name in fieldset['fields']:
+            row = self.rows.get(name)
+            if row is None:
+                row = self.rows[name] = _FieldRow(self, name, request)
+            rows.append(row)
+        # Don't show empty fieldsets
+        if not rows:
+            return
+        title = fieldset.get('name', '')
+        segments = _compile_segments(
+            lambda parts: self.form_cls._render_fieldset(
+                request, title, parts['fieldset_fields']),
+            ('fieldset_fields',)
+        )
+        if segments is None or len(segments) != 3:
+            self.fieldsets.append([_FieldsetFallback(self.form_cls, fieldset)])
+            return
+        head, _slot, tail = segments
+        self.fieldsets.append([head] + rows + [tail])
+
+    def render_fields(self, request, data):
+        return literal(''.join(self.iter_fields(request, data)))
+
+    def iter_fields(self, request, data):
+        """Yield rendered fieldsets one by one"""
+        errors = request.tmpl_context.form_errors
+        for items in self.fieldsets:
+            output = [
+                item if isinstance(item, six.string_types) else item(request, data, errors)
+                for item in items
+            ]
+            yield literal(''.join(output))
+
+
+class _FieldsetFallback(object):
+    __slots__ = ('form_cls', 'fieldset')
+
+    def __init__(self, form_cls, fieldset):
+        self.form_cls = form_cls
+        self.fieldset = fieldset
+
+    def __call__(self, request, data, errors):
+        return self.form_cls._generate_fields(request, self.fieldset, data)
+
+
+class _FieldRow(object):
+    """Compiled row of a single field"""
+    __slots__ = ('plan', 'form_cls', 'name', 'row_name', 'is_html', 'segments', 'cacheable')
+
+    # Override data with any of these keys changes the static part of a row
+    row_keys = frozenset(['type', 'title', 'tip', 'extra_html', 'tip_escape', 'input_only'])
+
+    def __init__(self, plan, name, request):
+        self.plan = plan
+        self.form_cls = form_cls = plan.form_cls
+        self.name = name
+        field = form_cls._specs[name]
+        self.is_html = field.type == 'html'
+        # Options loaded by callables may change between renders
+        options = field.kw.get('options')
+        self.cacheable = not (isinstance(options, OptionsSource) and callable(options.source))
+        if self.is_html:
+            # see InputField.__call__()
+            kw = {}
+            self.row_name = None
+        else:
+            kw = dict(field.kw)
+            self.row_name = name
+        if kw.get('input_only', False):
+            self.segments = ('', 'field_input', '')
+            return
+        tip = field.tooltip(request, field.tip, kw.get('tip_escape', False))
+        extra_html = literal(kw.get('extra_html', ''))
+        self.segments = _compile_segments(
+            lambda parts: field.row(request, self.row_name, field.title, '',
+                                    parts['field_input'], tip, extra_html),
+            ('field_input',)
         )
 
+    @timed('field_row', lambda self, request, data, errors: '{}.{}'.format(
+        self.form_cls.__name__, self.name))
+    def __call__(self, request, data, errors):
+        override = data.get(self.name, {})
+        error = errors.get(self.row_name, '')
+        if not (override or error) or not self.cacheable or not row_cache.maxsize:
+            return self._render(request, override, error)
+        # Rows with data or errors are cached by their effective values
+        try:
+            key = (self.plan, self.name, _freeze(override), _freeze(error))
+        except _Uncacheable:
+            return self._render(request, override, error)
+        row = _cached_fragment(key, row_cache, 'row_cache')
+        if row is None:
+            row = self._render(request, override, error)
+            row_cache.set(key, row)
+        return row
+
+    def _render(self, request, override, error):
+        if self.segments is None or error or self.row_keys.intersection(override):
+            return self.render(request, override)
+        field = self.form_cls._specs[self.name].override(override)
+        if self.is_html:
+            input = field.value
+            if not input:
+                return self.render(request, override)
+        else:
+            input = field.input(get_localizer(request))
+        return _fill_segments(self.segments, {'field_input': input})
+
+    def render(self, request, override):
+        return self.form_cls._specs[self.name].override(override)(request)
+
 
 class InputField(object):
+    __slots__ = ('type', 'tag_type', 'name', 'value', 'selected', 'title', 'tip',
+                 'form_name', 'kw', '_prepare', '_tag')
     tag_types = {
         'date': 'text'
     }
+    # Tag helpers replacing the webhelpers ones
+    tag_functions = {
+        'select': select
+    }
+    # Field attributes that aren't passed to the input through kw
+    attributes = frozenset(['name', 'value', 'selected', 'title', 'tip'])
+
     def __init__(self, type='html', name='', value=None, selected=False,
-                 title='', tip='', **kw):
-        if type != 'html':
-            try:
-                assert type in tags.__dict__
-            except AssertionError:
-                if type not in self.tag_types:
-                    raise FieldError('HTML field type "{}" is not supported by '
-                                     'webhelpers package'.format(type))
+                 title='', tip='', form_name='', **kw):
         self.type = type
         self.tag_type = self.tag_types.get(type, type)
+        if type == 'html':
+            self._prepare = self._tag = None
+        else:
+            self._tag = self.tag_functions.get(self.tag_type) or tags.__dict__.get(self.tag_type)
+            self._prepare = getattr(self.__class__, '_prepare_{}'.format(type), None)
+            if self._tag is None or self._prepare is None:
+                raise FieldError('HTML field type "{}" is not supported by '
+                                 'webhelpers package'.format(type))
         self.name = name
         self.value = value
         self.selected = selected
         self.title = title
         self.tip = tip
+        # Name of the form class owning the field, for metrics
+        self.form_name = form_name
         self.kw = kw
+        options = kw.get('options')
+        if type == 'select' and options is not None and not isinstance(options, OptionsSource):
+            # Options of field definitions are rendered once
+            if callable(options) or isinstance(options, (list, tuple)):
+                self.kw = dict(kw, options=OptionsSource(options, ttl=kw.get('options_ttl')))
+
+    def override(self, data):
+        """Return a copy of current field with ``data`` applied"""
+        if not data:
+            return self
+        if 'type' in data:
+            values = dict(self.kw, type=self.type, name=self.name, value=self.value,
+                          selected=self.selected, title=self.title, tip=self.tip,
+                          form_name=self.form_name)
+            values.update(data)
+            for key in VALIDATION_KEYS:
+                values.pop(key, None)
+            return self.__class__(**values)
+
+        field = self.__class__.__new__(self.__class__)
+        field.type = self.type
+        field.tag_type = self.tag_type
+        field._prepare = self._prepare
+        field._tag = self._tag
+        field.name = self.name
+        field.value = self.value
+        field.selected = self.selected
+        field.title = self.title
+        field.tip = self.tip
+        field.form_name = self.form_name
+        field.kw = self.kw
+        kw = None
+        for key, value in data.items():
+            if key in self.attributes:
+                setattr(field, key, value)
+            elif key not in VALIDATION_KEYS:
+                if kw is None:
+                    kw = field.kw = dict(self.kw)
+                kw[key] = value
+        return field
 
     def _prepare_date(self):
         return self._prepare_text()
@@ -483,6 +1332,8 @@ class InputField(object):
         }
 
 
+    @timed('field', lambda self, *args, **kwargs: self.form_name and '{}.{}'.format(
+        self.form_name, self.name) or self.name)
     def __call__(self, request, name=None, value=None, selected=None,
                  title=None, tip=None, data=None, **kwargs):
         # self.kw is global so we need thread-local kw dictionary here
@@ -503,14 +1354,7 @@ class InputField(object):
             if name is None:
                 name = self.name
 
-            kwargs = self.__getattribute__('_prepare_{}'.format(self.type))()
-            with_tip = self.kw.get('with_tip', kwargs.get('with_tip', True))
-            kwargs['class_'] = '{var}{const}'.format(
-                var=kwargs.get('class_', self.type),
-                const=(with_tip and ' with-tip' or '')
-            )
-            kwargs.update(self.kw.get('html5_attrs', {}))
-            input = tags.__dict__[self.tag_type](**kwargs)
+            input = self.input(get_localizer(request))
 
         extra_html = literal(kw.pop('extra_html', ''))
         tip_escape = kw.pop('tip_escape', False)
@@ -523,21 +1367,37 @@ class InputField(object):
         error = request.tmpl_context.form_errors.get(name, '')
         if error:
             error = field_error(request, error)
-        template_path = request.registry.settings.get(
-            'pyramid_webforms.field_tpl',
-            'pyramid_webforms:templates/field.p_wf_mako'
+        return self.row(request, name, title, error, input,
+                        self.tooltip(request, tip, tip_escape), extra_html)
+
+
+    def input(self, localizer=None):
+        """Render the input tag of current field"""
+        kwargs = self._prepare(self)
+        if self._tag is select:
+            # Labels of options are translated
+            kwargs['localizer'] = localizer
+        with_tip = self.kw.get('with_tip', kwargs.get('with_tip', True))
+        kwargs['class_'] = '{var}{const}'.format(
+            var=kwargs.get('class_', self.type),
+            const=(with_tip and ' with-tip' or '')
         )
+        kwargs.update(self.kw.get('html5_attrs', {}))
+        return self._tag(**kwargs)
+
+
+    def row(self, request, name, title, error, input, tip, extra_html):
+        """Render a table row of current field"""
         return literal(
-            render(template_path,
+            _render(request, 'field',
                 {
                     'field_name': name,
                     'field_title': title,
                     'field_error_message': error,
                     'field_input': input,
-                    'field_tip': self.tooltip(request, tip, tip_escape),
+                    'field_tip': tip,
                     'field_extras': extra_html
-                },
-                request
+                }
             )
         )
 
@@ -548,44 +1408,29 @@ class InputField(object):
             return ''
         if not escape_html:
             tip = literal(tip)
-        template_path = request.registry.settings.get(
-            'pyramid_webforms.tooltip_tpl',
-            'pyramid_webforms:templates/tooltip.p_wf_mako'
-        )
         return literal(
-            render(template_path,
-                {'tooltip_tip': tip},
-                request
+            _render(request, 'tooltip',
+                {'tooltip_tip': tip}
             )
         )
 
 
 def form_errors(request):
     if request.tmpl_context.form_errors:
-        template_path = request.registry.settings.get(
-            'pyramid_webforms.form_error_tpl',
-            'pyramid_webforms:templates/form_error.p_wf_mako'
-        )
         localizer = get_localizer(request)
         return literal(
-            render(template_path,
-                {'form_error_message': localizer.translate(_("Please correct your input parameters."))},
-                request
+            _render(request, 'form_error',
+                {'form_error_message': translate(localizer, FORM_ERROR_MESSAGE)}
             )
         )
     return ''
 
 
 def field_error(request, error):
-    template_path = request.registry.settings.get(
-        'pyramid_webforms.field_error_tpl',
-        'pyramid_webforms:templates/field_error.p_wf_mako'
-    )
-    localizer= get_localizer(request)
+    localizer = get_localizer(request)
     return literal(
-        render(template_path,
-            {'field_error_label': localizer.translate(_('Error')),
-             'field_error_text': error},
-            request
+        _render(request, 'field_error',
+            {'field_error_label': translate(localizer, ERROR_LABEL),
+             'field_error_text': error}
         )
     )
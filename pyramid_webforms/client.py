@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import re
+
+import six
+import formencode
+from formencode import validators, compound
+
+
+
+# Validator methods doing checks that can't be derived from attributes
+_CHECK_METHODS = ('to_python', '_to_python', 'validate_python', '_validate_python',
+                  '_convert_to_python', 'validate_other', '_validate_other')
+# Python regular expression syntax that JavaScript doesn't understand
+_PYTHON_ONLY_RE = re.compile(r'\(\?P|\(\?<[=!]|\(\?[aiLmsux]|\(\?#|\\[AZ]')
+# Input types that accept each rule as an HTML attribute
+_HTML_ATTRIBUTES = {
+    'required': ('text', 'password', 'textarea', 'select', 'checkbox', 'file', 'date'),
+    'minlength': ('text', 'password', 'textarea'),
+    'maxlength': ('text', 'password', 'textarea'),
+    'pattern': ('text', 'password'),
+    'type': ('text',),
+    'min': ('text',),
+    'max': ('text',),
+    'step': ('text',),
+}
+
+
+class Rules(object):
+    """Client-side rules of a field, and the validators each rule
+    comes from with the message key of its error.
+    """
+    def __init__(self):
+        self.rules = {}
+        self.sources = {}
+        self.unsupported = []
+
+    def add(self, rule, value, validator, code, **params):
+        self.rules[rule] = value
+        self.sources[rule] = (validator, code, params)
+
+    def messages(self, translate_message, state):
+        """Error messages of the rules translated with ``translate_message``"""
+        messages = {}
+        for rule, (validator, code, params) in self.sources.items():
+            try:
+                msg = validator.message(code, state, **params)
+            except (KeyError, TypeError):
+                continue
+            messages[rule] = translate_message(msg)
+        return messages
+
+
+def _instance(validator):
+    if isinstance(validator, type):
+        try:
+            return validator()
+        except Exception:
+            return None
+    return validator
+
+
+def _custom_checks(validator, base):
+    """Whether the class of ``validator`` overrides the checks of ``base``"""
+    for cls in type(validator).__mro__:
+        if cls is base:
+            return False
+        if any(name in cls.__dict__ for name in _CHECK_METHODS):
+            return True
+    return False
+
+
+def _has_alternation(pattern):
+    """Whether ``pattern`` has a ``|`` outside of groups and classes"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and not depth:
+            return True
+    return False
+
+
+def _js_pattern(regex):
+    """Return the HTML ``pattern`` matching the same values as
+    ``regex.search()``, or ``None`` if it can't be expressed.
+    """
+    if regex.flags & (re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE | re.LOCALE):
+        return None
+    pattern = regex.pattern
+    if isinstance(pattern, six.binary_type):
+        try:
+            pattern = pattern.decode('ascii')
+        except UnicodeDecodeError:
+            return None
+    if _PYTHON_ONLY_RE.search(pattern):
+        return None
+    # Patterns must match whole values
+    body = pattern[1:-1]
+    if pattern.startswith('^') and pattern.endswith('$') and \
+            (len(body) - len(body.rstrip('\\'))) % 2 == 0 and not _has_alternation(body):
+        return '(?:{})'.format(body)
+    return '[\\s\\S]*(?:{})[\\s\\S]*'.format(pattern)
+
+
+def _compile(validator, rules, field_type):
+    validator = _instance(validator)
+    if validator is None:
+        return
+    if getattr(validator, 'not_empty', False):
+        rules.add('required', True, validator, 'empty')
+
+    if isinstance(validator, (compound.All, compound.Pipe)):
+        for sub_validator in validator.validators:
+            _compile(sub_validator, rules, field_type)
+        return
+
+    if isinstance(validator, validators.ByteString):
+        base = validators.ByteString
+        if isinstance(validator, validators.UnicodeString):
+            base = validators.UnicodeString
+        if validator.min:
+            rules.add('minlength', validator.min, validator, 'tooShort', min=validator.min)
+        if validator.max:
+            rules.add('maxlength', validator.max, validator, 'tooLong', max=validator.max)
+    elif isinstance(validator, validators.MaxLength):
+        base = validators.MaxLength
+        rules.add('maxlength', validator.maxLength, validator, 'tooLong', maxLength=validator.maxLength)
+    elif isinstance(validator, validators.MinLength):
+        base = validators.MinLength
+        rules.add('minlength', validator.minLength, validator, 'tooShort', minLength=validator.minLength)
+    elif isinstance(validator, validators.Regex):
+        base = validators.Regex
+        if isinstance(validator, validators.PlainText):
+            base = validators.PlainText
+        pattern = validator.regex is not None and _js_pattern(validator.regex) or None
+        if pattern is None:
+            rules.unsupported.append(type(validator).__name__)
+            return
+        rules.add('pattern', pattern, validator, 'invalid')
+    elif isinstance(validator, validators.Email):
+        base = validators.Email
+        rules.add('type', 'email', validator, 'noAt')
+    elif isinstance(validator, (validators.Int, validators.Number)):
+        is_int = isinstance(validator, validators.Int)
+        base = is_int and validators.Int or validators.Number
+        rules.add('type', 'number', validator, is_int and 'integer' or 'number')
+        rules.add('step', is_int and 1 or 'any', validator, is_int and 'integer' or 'number')
+        if validator.min is not None:
+            rules.add('min', validator.min, validator, 'tooLow', min=validator.min)
+        if validator.max is not None:
+            rules.add('max', validator.max, validator, 'tooHigh', max=validator.max)
+    elif isinstance(validator, validators.OneOf) and field_type in ('select', 'checkbox'):
+        # The input only offers the allowed values
+        base = validators.OneOf
+    elif type(validator) in (formencode.FancyValidator, validators.NotEmpty, validators.Bool):
+        # Nothing to check but not_empty
+        return
+    else:
+        rules.unsupported.append(type(validator).__name__)
+        return
+
+    if _custom_checks(validator, base):
+        rules.unsupported.append(type(validator).__name__)
+
+
+def field_rules(field):
+    """Compile the ``validator`` of a field definition into :class:`Rules`"""
+    rules = Rules()
+    _compile(field.get('validator'), rules, field.get('type', 'text'))
+    return rules
+
+
+def html_attributes(field, rules):
+    """HTML5 attributes of the input of ``field`` for its :class:`Rules`"""
+    field_type = field.get('type', 'text')
+    attributes = {}
+    for rule, value in rules.rules.items():
+        if field_type not in _HTML_ATTRIBUTES[rule]:
+            continue
+        if rule == 'required':
+            value = 'required'
+        attributes[rule] = value
+    return attributes
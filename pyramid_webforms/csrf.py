@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import re
+import hmac
+import time
+import json
+import hashlib
+import binascii
+
+import six
+from webhelpers.html import escape
+from pyramid.exceptions import ConfigurationError
+from pyramid.response import Response
+from pyramid.settings import asbool
+from pyramid.util import DottedNameResolver
+
+
+
+DEFAULT_CSRF_TIMEOUT = 3600
+DEFAULT_CSRF_COOKIE = 'pwf_csrf'
+DEFAULT_CSRF_SCAN_LIMIT = 64 * 1024
+_SCAN_CHUNK_SIZE = 8192
+_BOUNDARY_RE = re.compile(r'boundary="?([^";,]+)"?', re.IGNORECASE)
+# Ways of putting tokens into rendered forms, see configure_csrf()
+CSRF_TOKEN_MODES = ('inline', 'substitute', 'fetch')
+# Rendered in place of tokens, and replaced by the substitution tween
+CSRF_TOKEN_PLACEHOLDER = '@@pwf-csrf-token@@'
+# Attributes of the rendered token input, the only markup substituted
+CSRF_TOKEN_MARKUP = 'name="{name}" type="hidden" value="{value}"'
+CSRF_TOKEN_ROUTE = 'pyramid_webforms.csrf_token'
+DEFAULT_CSRF_TOKEN_PATH = '/_pwf/csrf-token'
+# Fills the token inputs of the page from the token route
+_FETCH_SCRIPT = (
+    '<script data-pwf-csrf="{url}">(function(s){{'
+    'if(window.pwfCsrf)return;window.pwfCsrf=1;'
+    'function f(){{var x=new XMLHttpRequest();x.open("GET",s.getAttribute("data-pwf-csrf"));'
+    'x.onload=function(){{var t=JSON.parse(x.responseText).token,'
+    'i=document.querySelectorAll(\'input[name="{name}"]\');'
+    'for(var n=0;n<i.length;n++)i[n].value=t}};x.send()}}'
+    'document.readyState=="loading"?document.addEventListener("DOMContentLoaded",f):f()'
+    '}})(document.currentScript)</script>'
+)
+
+
+def _to_bytes(value):
+    if isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    return value
+
+
+def safe_compare(a, b):
+    """Compare two tokens in constant time"""
+    return hmac.compare_digest(_to_bytes(a), _to_bytes(b))
+
+
+class SessionCSRFBackend(object):
+    """CSRF tokens stored in the session (``request.session.get_csrf_token()``)"""
+
+    def get_token(self, request):
+        return request.session.get_csrf_token()
+
+    def check(self, request, token):
+        return safe_compare(self.get_token(request), token)
+
+
+class SignedCSRFBackend(object):
+    """Stateless CSRF tokens: timestamps signed with HMAC together with
+    a nonce kept in a cookie
+    """
+    def __init__(self, secret, timeout=DEFAULT_CSRF_TIMEOUT,
+                 cookie_name=DEFAULT_CSRF_COOKIE, secure=None):
+        if not secret:
+            raise ConfigurationError('pyramid_webforms.csrf_secret must be set '
+                                     'to use signed CSRF tokens')
+        self.secret = _to_bytes(secret)
+        self.timeout = timeout
+        self.cookie_name = cookie_name
+        self.secure = secure
+
+    def get_token(self, request):
+        nonce = self._nonce(request)
+        timestamp = '{:x}'.format(int(time.time()))
+        return '{}-{}'.format(timestamp, self._sign(nonce, timestamp))
+
+    def check(self, request, token):
+        nonce = request.cookies.get(self.cookie_name)
+        if not nonce or not token:
+            return False
+        try:
+            timestamp, signature = token.split('-', 1)
+            issued = int(timestamp, 16)
+        except ValueError:
+            return False
+        if not safe_compare(self._sign(nonce, timestamp), signature):
+            return False
+        return 0 <= time.time() - issued <= self.timeout
+
+    def _sign(self, nonce, timestamp):
+        message = _to_bytes('{}:{}'.format(nonce, timestamp))
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def _nonce(self, request):
+        nonce = request.cookies.get(self.cookie_name)
+        if nonce:
+            return nonce
+        # Several forms may be rendered within a single request
+        nonce = getattr(request, '_pwf_csrf_nonce', None)
+        if nonce is None:
+            nonce = request._pwf_csrf_nonce = binascii.hexlify(os.urandom(16)).decode('ascii')
+            secure = self.secure
+            if secure is None:
+                secure = getattr(request, 'scheme', None) == 'https'
+
+            def set_cookie(request, response):
+                response.set_cookie(self.cookie_name, nonce, httponly=True, secure=secure)
+            request.add_response_callback(set_cookie)
+        return nonce
+
+
+_session_backend = SessionCSRFBackend()
+
+
+def csrf_backend(registry):
+    """Return the CSRF token backend of the registry
+    (:class:`SessionCSRFBackend` unless configured otherwise).
+    """
+    return getattr(registry, 'pyramid_webforms_csrf', None) or _session_backend
+
+
+def configure_csrf(registry):
+    """Set up the CSRF token backend from the ``pyramid_webforms.csrf_*``
+    settings. ``pyramid_webforms.csrf_backend`` is either ``session``,
+    ``signed``, or a dotted name of a factory accepting the settings.
+    """
+    settings = registry.settings or {}
+    name = settings.get('pyramid_webforms.csrf_backend', 'session')
+    if name == 'session':
+        backend = _session_backend
+    elif name == 'signed':
+        secure = settings.get('pyramid_webforms.csrf_cookie_secure')
+        if secure is not None:
+            secure = asbool(secure)
+        backend = SignedCSRFBackend(
+            settings.get('pyramid_webforms.csrf_secret'),
+            timeout=int(settings.get('pyramid_webforms.csrf_timeout', DEFAULT_CSRF_TIMEOUT)),
+            cookie_name=settings.get('pyramid_webforms.csrf_cookie_name', DEFAULT_CSRF_COOKIE),
+            secure=secure
+        )
+    else:
+        backend = DottedNameResolver().maybe_resolve(name)(settings)
+    registry.pyramid_webforms_csrf = backend
+
+    mode = settings.get('pyramid_webforms.csrf_token_mode', 'inline')
+    if mode not in CSRF_TOKEN_MODES:
+        raise ConfigurationError('pyramid_webforms.csrf_token_mode must be one of: {}'.format(
+            ', '.join(CSRF_TOKEN_MODES)))
+    registry.pyramid_webforms_csrf_mode = mode
+    return backend
+
+
+def csrf_token_mode(registry):
+    """Return how tokens are put into rendered forms: ``inline``,
+    ``substitute`` or ``fetch``
+    """
+    return getattr(registry, 'pyramid_webforms_csrf_mode', 'inline')
+
+
+def rendered_token(request):
+    """Return the value of the token input of forms rendered for ``request``"""
+    mode = csrf_token_mode(request.registry)
+    if mode == 'inline':
+        return csrf_backend(request.registry).get_token(request)
+    if mode == 'substitute':
+        return CSRF_TOKEN_PLACEHOLDER
+    return ''
+
+
+def fetch_script(request, field_name):
+    """Return the script filling in the token inputs named ``field_name``
+    in the ``fetch`` mode.
+    """
+    return _FETCH_SCRIPT.format(url=escape(request.route_path(CSRF_TOKEN_ROUTE)),
+                                name=field_name)
+
+
+def _substitute_chunks(chunks, placeholder, replacement):
+    """Replace ``placeholder`` in an iterable of byte strings, including
+    the occurrences split across chunks, with the result of calling
+    ``replacement`` once.
+    """
+    keep = len(placeholder) - 1
+    tail = b''
+    value = None
+    try:
+        for chunk in chunks:
+            data = tail + chunk
+            if placeholder in data:
+                if value is None:
+                    value = replacement()
+                data = data.replace(placeholder, value)
+            # Keep the end that may be the start of a split placeholder
+            if len(data) > keep:
+                yield data[:-keep]
+                data = data[-keep:]
+            tail = data
+        if tail:
+            yield tail
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def csrf_substitution_tween_factory(handler, registry):
+    """Tween substituting the token of the request into the token inputs
+    of ``text/html`` responses
+    """
+    from .api import CSRF_TOKEN_KEY
+    placeholder = CSRF_TOKEN_MARKUP.format(
+        name=CSRF_TOKEN_KEY, value=CSRF_TOKEN_PLACEHOLDER).encode('ascii')
+
+    def csrf_substitution_tween(request):
+        response = handler(request)
+        if response.content_type != 'text/html':
+            return response
+
+        def replacement():
+            token = escape(csrf_backend(registry).get_token(request))
+            return CSRF_TOKEN_MARKUP.format(name=CSRF_TOKEN_KEY, value=token).encode('utf-8')
+
+        app_iter = response.app_iter
+        if isinstance(app_iter, (list, tuple)):
+            body = b''.join(app_iter)
+            if placeholder in body:
+                response.body = body.replace(placeholder, replacement())
+        else:
+            response.app_iter = _substitute_chunks(app_iter, placeholder, replacement)
+            response.content_length = None
+        return response
+    return csrf_substitution_tween
+
+
+def csrf_token_view(request):
+    """Return the token of the current request as ``{"token": "..."}``
+    for forms rendered in the ``fetch`` mode.
+    """
+    token = csrf_backend(request.registry).get_token(request)
+    response = Response(json.dumps({'token': token}).encode('utf-8'),
+                        content_type='application/json', charset='utf-8')
+    response.cache_control = 'no-store, private'
+    response.vary = ('Cookie',)
+    return response
+
+
+class _PrefixedInput(object):
+    """WSGI input stream replaying the bytes consumed by
+    :func:`multipart_token` before the rest of the body.
+    """
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=None):
+        prefix = self.prefix
+        if size is None or size < 0:
+            self.prefix = b''
+            return prefix + self.stream.read()
+        if not prefix:
+            return self.stream.read(size)
+        data, self.prefix = prefix[:size], prefix[size:]
+        if len(data) < size:
+            data += self.stream.read(size - len(data))
+        return data
+
+    def readline(self, size=None):
+        prefix = self.prefix
+        if not prefix:
+            if size is None or size < 0:
+                return self.stream.readline()
+            return self.stream.readline(size)
+        end = prefix.find(b'\n') + 1 or len(prefix)
+        if size is not None and 0 <= size < end:
+            end = size
+        data, self.prefix = prefix[:end], prefix[end:]
+        if not data.endswith(b'\n') and not self.prefix:
+            if size is None or size < 0:
+                data += self.stream.readline()
+            elif len(data) < size:
+                data += self.stream.readline(size - len(data))
+        return data
+
+
+def multipart_token(request, field_name, scan_limit=DEFAULT_CSRF_SCAN_LIMIT):
+    """Read the ``field_name`` part from the head of a multipart body,
+    putting the consumed bytes back. Returns ``None`` if it isn't found.
+    """
+    match = _BOUNDARY_RE.search(request.environ.get('CONTENT_TYPE', ''))
+    if match is None:
+        return None
+    delimiter = b'--' + re.escape(_to_bytes(match.group(1)))
+    part_re = re.compile(
+        delimiter + b'\r\nContent-Disposition:[ \t]*form-data;[ \t]*name="' +
+        re.escape(_to_bytes(field_name)) + b'"\r\n(?:[^\r\n]+\r\n)*\r\n(.*?)\r\n' + delimiter,
+        re.DOTALL | re.IGNORECASE
+    )
+
+    seekable = request.is_body_seekable
+    stream = seekable and request.body_file_raw or request.environ['wsgi.input']
+    length = request.content_length
+    head = b''
+    token = None
+    while len(head) < scan_limit:
+        size = _SCAN_CHUNK_SIZE
+        if length is not None:
+            size = min(size, length - len(head))
+            if size <= 0:
+                break
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        head += chunk
+        match = part_re.search(head)
+        if match is not None:
+            token = match.group(1).decode('utf-8', 'replace')
+            break
+        if b'; filename="' in head:
+            # The token is rendered before any file input
+            break
+
+    if seekable:
+        stream.seek(0)
+    else:
+        request.environ['wsgi.input'] = _PrefixedInput(head, stream)
+    return token
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import six
+import formencode
+
+from .i18n import translate
+
+
+
+# Code of errors raised with messages that aren't validator templates
+DEFAULT_ERROR_CODE = 'invalid'
+
+
+def message_codes(validator, codes=None, seen=None):
+    """Map message templates of ``validator`` and of the validators
+    nested in it (schema fields, compound and chained validators)
+    to their message keys, e.g. ``'Please enter a value'`` to ``'empty'``.
+    """
+    if codes is None:
+        codes = {}
+    if seen is None:
+        seen = set()
+    if validator is None or id(validator) in seen:
+        return codes
+    seen.add(id(validator))
+    for code, template in (getattr(validator, '_messages', None) or {}).items():
+        codes.setdefault(six.text_type(template), code)
+    nested = []
+    fields = getattr(validator, 'fields', None)
+    if isinstance(fields, dict):
+        nested.extend(fields.values())
+    for attr in ('validators', 'chained_validators', 'pre_validators'):
+        value = getattr(validator, attr, None)
+        if isinstance(value, (list, tuple)):
+            nested.extend(value)
+    for item in nested:
+        message_codes(item, codes, seen)
+    return codes
+
+
+def iter_errors(error, name=None):
+    """Yield ``(field name, message)`` pairs of the leaf errors of a
+    :class:`formencode.Invalid`
+    """
+    if isinstance(error, formencode.Invalid):
+        if error.error_dict:
+            for key, sub_error in error.error_dict.items():
+                for item in iter_errors(sub_error, name and '{}.{}'.format(name, key) or key):
+                    yield item
+            return
+        if error.error_list:
+            for index, sub_error in enumerate(error.error_list):
+                if sub_error is not None:
+                    for item in iter_errors(sub_error, '{}-{}'.format(name or '', index)):
+                        yield item
+            return
+        yield name, error.msg
+    elif error is not None:
+        yield name, error
+
+
+def message_text(localizer, msg):
+    """Translate an error message. FormEncode formats its templates with
+    ``%``, which only sets the mapping of ``TranslationString`` messages,
+    so the mapping is substituted into the translation here.
+    """
+    text = translate(localizer, msg)
+    mapping = getattr(msg, 'mapping', None)
+    if mapping and '%(' in text:
+        try:
+            text = text % mapping
+        except (KeyError, TypeError, ValueError):
+            pass
+    return text
+
+
+def error_payload(localizer, error, codes, order, message):
+    """Return a JSON-serializable dict of the errors of a
+    :class:`formencode.Invalid`
+    """
+    errors = []
+    for name, msg in iter_errors(error):
+        errors.append({
+            'field': name,
+            'message': message_text(localizer, msg),
+            'code': codes.get(six.text_type(msg), DEFAULT_ERROR_CODE),
+        })
+    # Errors of the whole form first, then the fields in the form order
+    errors.sort(key=lambda item: (item['field'] is not None,
+                                  order.get((item['field'] or '').split('.')[0].split('-')[0],
+                                            len(order)),
+                                  item['field']))
+    return {'message': translate(localizer, message), 'errors': errors}
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import six
+import formencode
+from formencode.schema import format_compound_error
+from webhelpers.html import literal, tags, escape
+
+from .api import (
+    CSRF_TOKEN_KEY, FormencodeState, FieldError, form_templates, field_error,
+    _render, _compile_segments, _fill_segments, _freeze, _Uncacheable
+)
+from .instrumentation import timed
+from .options import OptionsSource
+from .validation import iter_validate
+
+
+
+# Rows joined into a single chunk by FormSet.iterate()
+DEFAULT_CHUNK_ROWS = 100
+# Compiled variants of inputs that can't be filled by substitution
+MAX_INPUT_VARIANTS = 1024
+# Slots of the compiled inputs of a row
+_INPUT_SLOTS = ('input_name', 'input_value')
+
+
+# Subclasses of form classes rendering no fields, by form class
+_filtered_forms = {}
+
+
+def _compile_input(render_fn):
+    return _compile_segments(
+        lambda slots: render_fn(slots['input_name'], slots['input_value']), _INPUT_SLOTS)
+
+
+def _filtered_form(form_cls, hidden):
+    """Return the subclass of ``form_cls`` filtering out its fields and
+    the ``hidden`` ones, created once per form class.
+    """
+    filtered = _filtered_forms.get(form_cls)
+    if filtered is None:
+        filtered = _filtered_forms.setdefault(form_cls, type(
+            str('{}FormSet'.format(form_cls.__name__)), (form_cls,),
+            {'_filter_': list(form_cls._fields) + hidden}))
+    return filtered
+
+
+class FormSet(object):
+    """Grid of rows of a form class, e.g. for bulk editing, with inputs
+    named ``<prefix>-<index>.<field>``
+    """
+    def __init__(self, form_cls, prefix='rows', fields=None):
+        self.form_cls = form_cls
+        self.prefix = prefix
+        if fields is None:
+            fields = [name for fieldset in form_cls._params['fieldsets']
+                      for name in fieldset['fields']]
+        self.fields = [name for name in fields if form_cls._specs[name].type != 'html']
+        if not self.fields:
+            raise FieldError('Form {} has no fields for a formset'.format(form_cls.__name__))
+        self.hidden = [name for name in sorted(form_cls._hidden) if name != CSRF_TOKEN_KEY]
+        # A form without fields renders the form tag, the token and the buttons
+        self.form = _filtered_form(form_cls, self.hidden)()
+        # Inputs filled by substitution of their names and values
+        self._inputs = {}
+        for name in self.fields:
+            spec = form_cls._specs[name]
+            if spec.type == 'checkbox':
+                # Values of checkboxes are their checked state
+                self._inputs[name] = None
+                continue
+            self._inputs[name] = _compile_input(
+                lambda input_name, value, spec=spec:
+                    spec.override({'name': input_name, 'value': value}).input())
+        # Compiled inputs of selects and checkboxes by value
+        self._variants = {}
+        # Options loaded by callables may change between renders
+        self._loaded_options = set()
+        for name in self.fields:
+            options = form_cls._specs[name].kw.get('options')
+            if isinstance(options, OptionsSource) and callable(options.source):
+                self._loaded_options.add(name)
+        # Names of rows aren't valid ids
+        self._hidden_input = _compile_input(
+            lambda input_name, value: tags.__dict__['hidden'](input_name, value, id=None))
+        self._plans = {}
+
+    @timed('render', lambda self, request, rows, chunk_rows=DEFAULT_CHUNK_ROWS:
+           '{}.formset'.format(self.form_cls.__name__))
+    def __call__(self, request, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Render the form with a grid of ``rows``, an iterable of dicts of
+        field values or field data
+        """
+        return literal(''.join(self.iterate(request, rows, chunk_rows)))
+
+    def iterate(self, request, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Render the form as an iterable of HTML chunks, consuming ``rows``
+        while rendering
+        """
+        form = self.form
+        context = form._render_context(request)
+        parts = form._prepare_parts(request, context, fields=False)
+        grid = self._iter_grid(request, context.localizer, rows, chunk_rows)
+        form_plan = context.plan
+        if form_plan is None or form_plan.form is None:
+            yield form._render_form(request, {
+                'form_attributes': parts['attributes'],
+                'form_fields': literal(''.join(grid)),
+                'form_buttons': parts['buttons'],
+                'form_footer': parts['footer'],
+            })
+            return
+        for idx, item in enumerate(form_plan.form):
+            if not idx % 2:
+                if item:
+                    yield literal(item)
+            elif item != 'form_fields':
+                yield parts[item[len('form_'):]]
+            else:
+                for chunk in grid:
+                    yield chunk
+
+    def _iter_grid(self, request, localizer, rows, chunk_rows):
+        plan = self._plan(request, localizer)
+        errors = (request.tmpl_context.form_errors or {}).get(self.prefix) or []
+        if plan is None or plan.head is None:
+            yield self._render_grid(request, literal(''.join(
+                self._render_row(request, localizer, plan, index, row, errors)
+                for index, row in enumerate(rows))))
+            return
+        yield literal(plan.head)
+        output = []
+        for index, row in enumerate(rows):
+            output.append(self._render_row(request, localizer, plan, index, row, errors))
+            if len(output) == chunk_rows:
+                yield literal(''.join(output))
+                output = []
+        if output:
+            yield literal(''.join(output))
+        yield literal(plan.tail)
+
+    def _plan(self, request, localizer):
+        """Return the :class:`_GridPlan` for the current locale, or
+        ``None`` if render plans are disabled.
+        """
+        templates = form_templates(request.registry)
+        if not templates.render_plans:
+            return None
+        key = (localizer.locale_name, templates)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = _GridPlan(self, request)
+        return plan
+
+    def invalidate_cache(self):
+        """Drop the compiled grids, e.g. after overriding the templates"""
+        self._plans.clear()
+
+    def _render_row(self, request, localizer, plan, index, row, errors):
+        prefix = '{}-{}.'.format(self.prefix, index)
+        error = index < len(errors) and errors[index] or None
+        row_error = None
+        if error and not isinstance(error, dict):
+            row_error, error = error, None
+        error = error or {}
+        hidden = []
+        for name in self.hidden:
+            value = row.get(name, self.form_cls._hidden[name].get('value'))
+            hidden.append(self._input(prefix + name, value, self._hidden_input))
+        cells = []
+        for name in self.fields:
+            spec = self.form_cls._specs[name]
+            # Values of checkboxes are their checked state, not the value attribute
+            value = row.get(name, spec.selected if spec.type == 'checkbox' else spec.value)
+            cell = self._field_input(localizer, prefix + name, name, value)
+            if error.get(name):
+                cell += field_error(request, error[name])
+            cells.append(cell)
+        cells[0] = literal(''.join(hidden)) + cells[0]
+        # Errors of hidden fields and of the whole row are shown above it
+        messages = [error[name] for name in self.hidden if error.get(name)]
+        if row_error:
+            messages.append(row_error)
+        if messages or plan is None or plan.row is None:
+            return self._render_row_template(
+                request, cells, messages and field_error(request, '; '.join(
+                    six.text_type(message) for message in messages)) or '')
+        return _fill_segments(plan.row, dict(
+            ('cell_{}'.format(position), cell) for position, cell in enumerate(cells)))
+
+    def _field_input(self, localizer, input_name, name, value):
+        spec = self.form_cls._specs[name]
+        if isinstance(value, dict):
+            return spec.override(dict(value, name=input_name)).input(localizer)
+        segments = self._inputs[name]
+        if segments is not None:
+            return self._input(input_name, value, segments)
+        if name in self._loaded_options:
+            return self._render_input(spec, localizer, input_name, value)
+        # Inputs with a few distinct values (selects, checkboxes)
+        # are compiled for each value
+        try:
+            key = (name, localizer.locale_name, _freeze(value))
+        except _Uncacheable:
+            return self._render_input(spec, localizer, input_name, value)
+        segments = self._variants.get(key)
+        if segments is None:
+            if len(self._variants) >= MAX_INPUT_VARIANTS:
+                return self._render_input(spec, localizer, input_name, value)
+            segments = _compile_segments(
+                lambda slots: self._render_input(spec, localizer, slots['input_name'], value),
+                ('input_name',)
+            )
+            # False marks inputs that cannot be compiled
+            segments = self._variants[key] = segments or False
+        if not segments:
+            return self._render_input(spec, localizer, input_name, value)
+        return literal(_fill_segments(segments, {'input_name': escape(input_name)}))
+
+    def _render_input(self, spec, localizer, input_name, value):
+        if spec.type == 'checkbox':
+            return spec.override({'name': input_name, 'selected': bool(value)}).input(localizer)
+        return spec.override({'name': input_name, 'value': value}).input(localizer)
+
+    def _input(self, input_name, value, segments):
+        return literal(_fill_segments(segments, {'input_name': escape(input_name),
+                                                 'input_value': escape(value)}))
+
+    def _render_grid(self, request, rows_html):
+        return literal(_render(request, 'formset', {
+            'formset_titles': [self.form_cls._specs[name].title for name in self.fields],
+            'formset_rows': rows_html,
+        }))
+
+    def _render_row_template(self, request, cells, row_error):
+        return literal(_render(request, 'formset_row', {
+            'formset_cells': cells,
+            'formset_row_error': row_error,
+        }))
+
+    def submitted(self, request):
+        """Return the submitted rows as a list of dicts of raw values,
+        in the order of their indexes, e.g. to render the grid again
+        with the errors raised by :meth:`validate`.
+        """
+        if self.form_cls._params['method'] == 'post':
+            data = request.POST
+        elif self.form_cls._params['method'] == 'get':
+            data = request.GET
+        else:
+            data = request.params
+        marker = self.prefix + '-'
+        rows = {}
+        # A single pass over the input
+        for key, value in data.items():
+            if not key.startswith(marker):
+                continue
+            index, sep, name = key[len(marker):].partition('.')
+            if not sep or not index.isdigit():
+                continue
+            row = rows.setdefault(int(index), {})
+            if name in row:
+                # Repeated inputs (e.g. multiple selects)
+                if not isinstance(row[name], list):
+                    row[name] = [row[name]]
+                row[name].append(value)
+            else:
+                row[name] = value
+        return [rows[index] for index in sorted(rows)]
+
+    @timed('validate', lambda self, request, state=None: '{}.formset'.format(
+        self.form_cls.__name__))
+    def validate(self, request, state=None):
+        """Validate the CSRF token and all submitted rows. Raises ``Invalid``
+        with a list of row errors under the prefix.
+        """
+        if state is None:
+            state = FormencodeState(request=request)
+        rows = self.submitted(request)
+        errors = {}
+        token_field = self.form._hidden.get(CSRF_TOKEN_KEY)
+        if token_field is not None:
+            data = request.POST
+            try:
+                token_field['validator'].to_python(data.get(CSRF_TOKEN_KEY), state)
+            except formencode.Invalid as e:
+                errors[CSRF_TOKEN_KEY] = e
+
+        results = []
+        row_errors = []
+        for index, result in iter_validate(self.form_cls, rows, state):
+            if isinstance(result, formencode.Invalid):
+                row_errors.append(result)
+                results.append(None)
+            else:
+                row_errors.append(None)
+                results.append(result)
+        if any(row_errors):
+            errors[self.prefix] = formencode.Invalid(
+                format_compound_error(row_errors), rows, state, error_list=row_errors)
+        if errors:
+            raise formencode.Invalid(format_compound_error(errors), rows, state,
+                                     error_dict=errors)
+        return results
+
+
+class _GridPlan(object):
+    """Static HTML of the grid of a formset compiled for a single locale:
+    the head and the tail of the grid around its rows, and the segments
+    of a row without errors with a slot for each cell.
+    """
+    def __init__(self, formset, request):
+        segments = _compile_segments(
+            lambda parts: formset._render_grid(request, parts['formset_rows']),
+            ('formset_rows',)
+        )
+        if segments is None or len(segments) != 3:
+            self.head = self.tail = None
+        else:
+            self.head, _slot, self.tail = segments
+        slots = tuple('cell_{}'.format(position) for position in range(len(formset.fields)))
+        self.row = _compile_segments(
+            lambda parts: formset._render_row_template(
+                request, [parts[slot] for slot in slots], ''),
+            slots
+        )
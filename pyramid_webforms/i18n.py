@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import re
+
+from pyramid.i18n import TranslationString
+from pyramid.threadlocal import get_current_registry
+
+
+
+def _key(string):
+    return (string.domain, string.context, string.default, string)
+
+
+def _cacheable(string):
+    return isinstance(string, TranslationString) and not string.mapping
+
+
+def translation_table(localizer):
+    """Return the lookup table of translated strings of ``localizer``
+    (a dict keyed by domain, context, default and message id), filled with
+    the strings of :func:`load_translations` on first use.
+    """
+    table = getattr(localizer, 'pyramid_webforms_table', None)
+    if table is None:
+        table = {}
+        registry = get_current_registry()
+        if localizer.locale_name in configured_locales(registry.settings or {}):
+            for string in getattr(registry, 'pyramid_webforms_strings', ()):
+                table[_key(string)] = localizer.translate(string)
+        localizer.pyramid_webforms_table = table
+    return table
+
+
+def translate(localizer, string):
+    """Translate ``string`` with a lookup in the table of ``localizer``"""
+    if not _cacheable(string):
+        return localizer.translate(string)
+    key = _key(string)
+    table = translation_table(localizer)
+    try:
+        return table[key]
+    except KeyError:
+        result = table[key] = localizer.translate(string)
+        return result
+
+
+def configured_locales(settings):
+    """Locale names of the ``pyramid_webforms.locales`` setting,
+    or the default locale name of the application.
+    """
+    locales = settings.get('pyramid_webforms.locales')
+    if not locales:
+        return [settings.get('pyramid.default_locale_name') or
+                settings.get('default_locale_name') or 'en']
+    return [name for name in re.split(r'[\s,]+', locales) if name]
+
+
+def load_translations(registry, strings):
+    """Set ``strings`` to be translated into the table of a localizer of
+    the configured locales when the table is first used.
+    """
+    registry.pyramid_webforms_strings = [string for string in strings if _cacheable(string)]
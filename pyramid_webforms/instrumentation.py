@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import re
+import socket
+import logging
+import functools
+import threading
+import timeit
+
+from pyramid.util import DottedNameResolver
+
+
+
+log = logging.getLogger(__name__)
+clock = timeit.default_timer
+DEFAULT_STATSD_PORT = 8125
+DEFAULT_STATSD_PREFIX = 'pyramid_webforms'
+# The active Collector, None while instrumentation is disabled
+collector = None
+
+
+def set_collector(value):
+    """Enable instrumentation with a :class:`Collector`, or disable it with ``None``"""
+    global collector
+    collector = value
+
+
+def timed(kind, name):
+    """Decorator recording durations of calls as ``<kind>.<name>`` metrics,
+    where ``name`` is a function of the call arguments. Costs a global
+    lookup per call while instrumentation is disabled.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            active = collector
+            if active is None:
+                return func(*args, **kwargs)
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                active.timing(kind, name(*args, **kwargs), clock() - started)
+        return wrapper
+    return decorator
+
+
+class Collector(object):
+    """Aggregates counts and durations of metrics and passes them on
+    to the sinks
+    """
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.timings = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def timing(self, kind, name, duration):
+        metric = '{}.{}'.format(kind, name)
+        with self._lock:
+            stats = self.timings.get(metric)
+            if stats is None:
+                self.timings[metric] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                if duration > stats[2]:
+                    stats[2] = duration
+        totals = getattr(self._local, 'totals', None)
+        if totals is not None:
+            total = totals.get(kind)
+            if total is None:
+                totals[kind] = [1, duration]
+            else:
+                total[0] += 1
+                total[1] += duration
+        for sink in self.sinks:
+            sink.timing(metric, duration)
+
+    def incr(self, kind, name, count=1):
+        metric = '{}.{}'.format(kind, name)
+        with self._lock:
+            self.counters[metric] = self.counters.get(metric, 0) + count
+        for sink in self.sinks:
+            sink.incr(metric, count)
+
+    def begin(self):
+        """Start summing up durations of the current thread's request"""
+        totals = self._local.totals = {}
+        return totals
+
+    def end(self):
+        totals = getattr(self._local, 'totals', None)
+        self._local.totals = None
+        return totals or {}
+
+    def snapshot(self):
+        """Aggregated timings and counters, and the stats of the fragment
+        and row caches and of the memoized validators by form class.
+        """
+        from .api import fragment_cache, row_cache, form_classes
+        with self._lock:
+            timings = dict(
+                (metric, {'count': count, 'total': total, 'max': maximum,
+                          'mean': total / count})
+                for metric, (count, total, maximum) in self.timings.items()
+            )
+            counters = dict(self.counters)
+        validators = {}
+        for form_cls in form_classes():
+            stats = form_cls.validator_cache_stats()
+            if stats:
+                validators[form_cls.__name__] = stats
+        return {
+            'timings': timings,
+            'counters': counters,
+            'caches': {'fragments': fragment_cache.stats(), 'rows': row_cache.stats(),
+                       'validators': validators},
+        }
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
+
+
+class CallbackSink(object):
+    """Sink calling ``callback(metric, value, type)`` where ``type`` is
+    ``'ms'`` for durations in milliseconds and ``'c'`` for counters.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+
+    def timing(self, metric, duration):
+        self.callback(metric, duration * 1000, 'ms')
+
+    def incr(self, metric, count=1):
+        self.callback(metric, count, 'c')
+
+
+class LoggingSink(object):
+    """Sink writing measurements to the ``pyramid_webforms.instrumentation``
+    logger at the DEBUG level.
+    """
+    def __init__(self, logger=log):
+        self.logger = logger
+
+    def timing(self, metric, duration):
+        self.logger.debug('%s: %.3f ms', metric, duration * 1000)
+
+    def incr(self, metric, count=1):
+        self.logger.debug('%s: +%d', metric, count)
+
+
+class StatsdSink(object):
+    """Sink sending measurements to a statsd daemon over UDP"""
+    def __init__(self, host='localhost', port=DEFAULT_STATSD_PORT,
+                 prefix=DEFAULT_STATSD_PREFIX):
+        self.address = (host, int(port))
+        self.prefix = prefix and prefix + '.' or ''
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def timing(self, metric, duration):
+        self._send('{}{}:{:.3f}|ms'.format(self.prefix, metric, duration * 1000))
+
+    def incr(self, metric, count=1):
+        self._send('{}{}:{}|c'.format(self.prefix, metric, count))
+
+    def _send(self, data):
+        try:
+            self.socket.sendto(data.encode('utf-8'), self.address)
+        except socket.error:
+            # Metrics must never break requests
+            pass
+
+
+def configure_instrumentation(registry):
+    """Enable instrumentation if ``pyramid_webforms.instrumentation``
+    lists any sinks: ``logging``, ``statsd``, or dotted names of
+    factories accepting the settings.
+    """
+    settings = registry.settings or {}
+    names = [name for name in re.split(r'[\s,]+', settings.get('pyramid_webforms.instrumentation', ''))
+             if name]
+    if not names:
+        return None
+    sinks = []
+    for name in names:
+        if name == 'logging':
+            sinks.append(LoggingSink())
+        elif name == 'statsd':
+            sinks.append(StatsdSink(
+                settings.get('pyramid_webforms.statsd_host', 'localhost'),
+                settings.get('pyramid_webforms.statsd_port', DEFAULT_STATSD_PORT),
+                settings.get('pyramid_webforms.statsd_prefix', DEFAULT_STATSD_PREFIX)
+            ))
+        else:
+            sinks.append(DottedNameResolver().maybe_resolve(name)(settings))
+    registry.pyramid_webforms_collector = active = Collector(sinks)
+    set_collector(active)
+    return active
+
+
+def instrumentation_tween_factory(handler, registry):
+    """Tween attaching the durations of form rendering and validation
+    summed up by kind to ``request.pyramid_webforms_timings``, and
+    recording them as ``request.<kind>`` metrics.
+    """
+    def instrumentation_tween(request):
+        active = collector
+        if active is None:
+            return handler(request)
+        request.pyramid_webforms_timings = active.begin()
+        try:
+            return handler(request)
+        finally:
+            for kind, (count, total) in active.end().items():
+                active.timing('request', kind, total)
+    return instrumentation_tween
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import io
+import os
+import re
+import hashlib
+
+import mako
+from pyramid.asset import abspath_from_asset_spec
+from pyramid.mako_templating import IMakoLookup
+from pyramid.renderers import RendererHelper
+
+
+
+RENDERER_PREFIX = 'p_wf_mako.'
+_UNSAFE_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class ModuleNames(object):
+    """``modulename_callable`` of a Mako lookup naming generated modules
+    after the digest of the template source
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, filename, uri):
+        digest = hashlib.sha1(mako.__version__.encode('ascii'))
+        with io.open(filename, 'rb') as source:
+            digest.update(source.read())
+        name = '{}-{}.py'.format(_UNSAFE_RE.sub('_', uri).strip('_'), digest.hexdigest()[:16])
+        return os.path.join(self.directory, name)
+
+
+def configure_module_directory(registry, directory, template):
+    """Make the ``p_wf_mako`` Mako lookup keep generated modules in
+    ``directory`` (a path or an asset spec)
+    """
+    lookup = registry.queryUtility(IMakoLookup, name=RENDERER_PREFIX)
+    if lookup is None:
+        RendererHelper(name=template, registry=registry).renderer
+        lookup = registry.queryUtility(IMakoLookup, name=RENDERER_PREFIX)
+    if lookup is None:
+        return None
+    directory = abspath_from_asset_spec(directory)
+    lookup.modulename_callable = ModuleNames(directory)
+    return lookup
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import time
+import threading
+
+import six
+import formencode
+from webhelpers.html import HTML, literal, tags
+from .i18n import translate
+
+
+
+NL = literal('\n')
+
+
+class OptionsSource(object):
+    """Options of select fields rendered to HTML once, optionally loaded
+    from a callable and reloaded after ``ttl`` seconds
+    """
+    def __init__(self, options, ttl=None, translate=False):
+        self.source = options
+        self.ttl = ttl
+        self.translate = translate
+        self._state = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        state = self._state
+        if state is None or (state[0] is not None and time.time() >= state[0]):
+            with self._lock:
+                state = self._state
+                if state is None or (state[0] is not None and time.time() >= state[0]):
+                    options = self.source
+                    if callable(options):
+                        options = options()
+                    options = tags.Options(options)
+                    values = []
+                    for option in options:
+                        if isinstance(option, tags.OptGroup):
+                            values.extend(option.options.values())
+                        else:
+                            values.append(option.value)
+                    expires = None
+                    if self.ttl is not None and callable(self.source):
+                        expires = time.time() + self.ttl
+                    # (expiration time, options, values, rendered HTML by locale)
+                    state = self._state = (expires, options, frozenset(values), {})
+        return state
+
+    def invalidate(self):
+        """Evaluate the options again on next use"""
+        self._state = None
+
+    def options(self):
+        return self._load()[1]
+
+    def values(self):
+        """Set of the option values"""
+        return self._load()[2]
+
+    def __contains__(self, value):
+        return value in self._load()[2]
+
+    def render(self, selected_values, localizer=None):
+        """Render the ``<option>`` tags the way :func:`webhelpers.html.tags.select` does"""
+        html, spans = self._rendered(localizer)
+        if selected_values is None:
+            selected_values = ('',)
+        elif not isinstance(selected_values, (list, tuple)):
+            selected_values = [selected_values]
+        selected = []
+        for value in set(six.text_type(value) for value in selected_values):
+            for start, end, label in spans.get(value, ()):
+                selected.append((start, end, HTML.option(label, value=value, selected='selected')))
+        if not selected:
+            return html
+        selected.sort(key=lambda item: item[0])
+        output = []
+        position = 0
+        for start, end, option in selected:
+            output.append(html[position:start])
+            output.append(option)
+            position = end
+        output.append(html[position:])
+        return literal(''.join(output))
+
+    def _rendered(self, localizer):
+        locale_name = None
+        if self.translate and localizer is not None:
+            locale_name = localizer.locale_name
+        else:
+            localizer = None
+        cache = self._load()[3]
+        rendered = cache.get(locale_name)
+        if rendered is None:
+            rendered = cache[locale_name] = self._render(localizer)
+        return rendered
+
+    def _render(self, localizer):
+        """Return the HTML of the options without a selection, and spans
+        of the options in it by value.
+        """
+        output = []
+        spans = {}
+        length = [0]
+
+        def label_of(label):
+            if localizer is not None:
+                return translate(localizer, label)
+            return label
+
+        def append(text):
+            output.append(text)
+            length[0] += len(text)
+
+        def append_option(option):
+            label = label_of(option.label)
+            text = HTML.option(label, value=option.value)
+            spans.setdefault(option.value, []).append((length[0], length[0] + len(text), label))
+            append(text)
+
+        for index, option in enumerate(self.options()):
+            if index:
+                append(NL)
+            if isinstance(option, tags.OptGroup):
+                start, end = HTML.optgroup(NL, literal('\0'), NL,
+                                           label=label_of(option.label)).split('\0')
+                append(start)
+                for sub_index, sub_option in enumerate(option.options):
+                    if sub_index:
+                        append(NL)
+                    append_option(sub_option)
+                append(end)
+            else:
+                append_option(option)
+        return literal(''.join(output)), spans
+
+
+def select(name, selected_values, options, id=tags.NotGiven, localizer=None, **attrs):
+    """:func:`webhelpers.html.tags.select` rendering :class:`OptionsSource`
+    options from their cached HTML.
+    """
+    if not isinstance(options, OptionsSource):
+        return tags.select(name, selected_values, options, id=id, **attrs)
+    prompt = attrs.pop('prompt', None)
+    # An empty select element is "<select ...>\n\n</select>"
+    head, tail = tags.select(name, selected_values, (), id=id, **attrs).rsplit(NL, 1)
+    html = options.render(selected_values, localizer)
+    if prompt:
+        prompt_html = tags.select(name, selected_values, (), prompt=prompt).split(NL)[1]
+        html = html and prompt_html + NL + html or prompt_html
+    return literal(''.join((head, html, NL, tail)))
+
+
+class InOptions(formencode.FancyValidator):
+    """Validator checking that a value, or each value of a list,
+    is one of the values of an :class:`OptionsSource`.
+    """
+    source = None
+    __unpackargs__ = ('source',)
+
+    messages = dict(
+        notIn='Please select one of the options'
+    )
+
+    def _validate_python(self, value, state):
+        values = isinstance(value, (list, tuple)) and value or (value,)
+        allowed = self.source.values()
+        for item in values:
+            if six.text_type(item) not in allowed:
+                raise formencode.Invalid(self.message('notIn', state), value, state)
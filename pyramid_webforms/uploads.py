@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import io
+import os
+import re
+import cgi
+import shutil
+import hashlib
+import tempfile
+
+import formencode
+from pyramid.httpexceptions import exception_response
+from webob.multidict import MultiDict
+
+
+
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Non-file parts are read into memory up to this size
+DEFAULT_MAX_FIELD_SIZE = 256 * 1024
+# Headers of a part are never expected to be larger than this
+MAX_HEADERS_SIZE = 16 * 1024
+_BOUNDARY_RE = re.compile(r'boundary="?([^";,]+)"?', re.IGNORECASE)
+
+
+class UploadHandle(object):
+    """Uploaded file spooled to a temporary file, or written to ``path``"""
+    __slots__ = ('name', 'filename', 'type', 'size', 'file', 'path', 'digests')
+
+    def __init__(self, name, filename, type=None):
+        self.name = name
+        self.filename = filename
+        self.type = type
+        self.size = 0
+        self.file = None
+        self.path = None
+        self.digests = {}
+
+    def __repr__(self):
+        return '<UploadHandle {!r} ({} bytes)>'.format(self.filename, self.size)
+
+    def open(self):
+        """Return a binary file object positioned at the beginning of the upload"""
+        if self.path is not None:
+            return io.open(self.path, 'rb')
+        self.file.seek(0)
+        return self.file
+
+    def save(self, path):
+        """Move or copy the upload to ``path``"""
+        if self.path is not None:
+            shutil.move(self.path, path)
+            self.path = path
+            return
+        with io.open(path, 'wb') as target:
+            shutil.copyfileobj(self.open(), target, DEFAULT_CHUNK_SIZE)
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class MagicNumber(object):
+    """Chunk validator checking that an upload starts with one
+    of the given byte ``signatures``.
+    """
+    message = 'The file type is not allowed'
+
+    def __init__(self, *signatures):
+        self.signatures = signatures
+        self.length = max(len(signature) for signature in signatures)
+
+    def checker(self):
+        return _MagicChecker(self)
+
+
+class _MagicChecker(object):
+    def __init__(self, validator):
+        self.validator = validator
+        self.head = b''
+
+    def update(self, chunk, state):
+        length = self.validator.length
+        if len(self.head) < length:
+            self.head += chunk[:length - len(self.head)]
+            if len(self.head) == length:
+                self._check(state)
+
+    def finish(self, handle, state):
+        if len(self.head) < self.validator.length:
+            self._check(state)
+
+    def _check(self, state):
+        if not any(self.head.startswith(signature) for signature in self.validator.signatures):
+            trans = getattr(state, '_', None) or (lambda message: message)
+            raise formencode.Invalid(trans(self.validator.message), None, state)
+
+
+class Digest(object):
+    """Chunk validator computing a hash of an upload,
+    stored in ``handle.digests[algorithm]``.
+    """
+    def __init__(self, algorithm='sha256'):
+        self.algorithm = algorithm
+
+    def checker(self):
+        return _DigestChecker(self.algorithm)
+
+
+class _DigestChecker(object):
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.hash = hashlib.new(algorithm)
+
+    def update(self, chunk, state):
+        self.hash.update(chunk)
+
+    def finish(self, handle, state):
+        handle.digests[self.algorithm] = self.hash.hexdigest()
+
+
+class FileUpload(formencode.FancyValidator):
+    """Validator of a file field streaming uploads into :class:`UploadHandle`
+    instances, checking ``max_size``, ``max_count`` and ``chunk_validators``
+    while reading
+    """
+    max_size = None
+    max_count = 1
+    spool_size = DEFAULT_SPOOL_SIZE
+    chunk_size = DEFAULT_CHUNK_SIZE
+    target_dir = None
+    chunk_validators = ()
+    accept_iterator = True
+
+    messages = dict(
+        tooLarge='The file is too large (the maximum is %(max_size)s bytes)',
+        tooMany='Too many files (the maximum is %(max_count)s)',
+        notAFile='Please upload a file'
+    )
+
+    def receive(self, name, filename, content_type, chunks, state):
+        """Write the ``chunks`` of an upload to a new :class:`UploadHandle`"""
+        handle = UploadHandle(name, filename, content_type)
+        if self.target_dir is not None:
+            handle.file = tempfile.NamedTemporaryFile(
+                dir=self.target_dir, prefix='pwf-', delete=False)
+            handle.path = handle.file.name
+        else:
+            handle.file = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        checkers = [validator.checker() for validator in self.chunk_validators]
+        try:
+            for chunk in chunks:
+                handle.size += len(chunk)
+                if self.max_size is not None and handle.size > self.max_size:
+                    raise formencode.Invalid(
+                        self.message('tooLarge', state, max_size=self.max_size), handle, state)
+                for checker in checkers:
+                    checker.update(chunk, state)
+                handle.file.write(chunk)
+            for checker in checkers:
+                checker.finish(handle, state)
+        except BaseException:
+            handle.discard()
+            raise
+        if handle.path is not None:
+            handle.file.close()
+            handle.file = None
+        else:
+            handle.file.seek(0)
+        return handle
+
+    def too_many(self, value, state):
+        return formencode.Invalid(
+            self.message('tooMany', state, max_count=self.max_count), value, state)
+
+    def is_empty(self, value):
+        if isinstance(value, cgi.FieldStorage):
+            return not value.filename
+        return formencode.FancyValidator.is_empty(self, value)
+
+    def _convert_to_python(self, value, state):
+        values = isinstance(value, list) and value or [value]
+        if len(values) > self.max_count:
+            raise self.too_many(value, state)
+        handles = []
+        for item in values:
+            if isinstance(item, formencode.Invalid):
+                # Rejected while streaming the request body
+                raise item
+            if not isinstance(item, UploadHandle):
+                if not getattr(item, 'filename', None) or not hasattr(item, 'file'):
+                    raise formencode.Invalid(self.message('notAFile', state), item, state)
+                # The body was parsed by WebOb already
+                item = self.receive(None, item.filename, getattr(item, 'type', None),
+                                    _iter_file(item.file, self.chunk_size), state)
+            handles.append(item)
+        if self.max_count == 1:
+            return handles[0]
+        return handles
+
+
+def _iter_file(fileobj, chunk_size):
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _drain(chunks):
+    for chunk in chunks:
+        pass
+
+
+def _read_field(chunks, max_size):
+    data = []
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise exception_response(413)
+        data.append(chunk)
+    return b''.join(data)
+
+
+def discard_uploads(data):
+    """Discard the :class:`UploadHandle` values of a ``MultiDict``, leaving
+    empty values in place of them and of the rejected fields
+    """
+    items = []
+    for name, value in data.items():
+        if isinstance(value, UploadHandle):
+            value.discard()
+            value = ''
+        elif isinstance(value, formencode.Invalid):
+            value = ''
+        items.append((name, value))
+    data.clear()
+    data.extend(items)
+
+
+def parse_uploads(request, uploads, state, chunk_size=DEFAULT_CHUNK_SIZE, max_field_size=None):
+    """Parse a multipart request body in a single pass, streaming the files
+    of the ``uploads`` fields through their validators. Returns the fields
+    as a ``MultiDict`` set as ``request.POST``, or ``None``.
+    """
+    environ = request.environ
+    if request.content_type != 'multipart/form-data' or 'webob._parsed_post_vars' in environ:
+        return None
+    match = _BOUNDARY_RE.search(environ.get('CONTENT_TYPE', ''))
+    if match is None:
+        raise exception_response(400)
+    if max_field_size is None:
+        settings = request.registry.settings or {}
+        max_field_size = int(settings.get('pyramid_webforms.max_field_size',
+                                          DEFAULT_MAX_FIELD_SIZE))
+    if request.is_body_seekable:
+        request.body_file_raw.seek(0)
+    charset = request.charset or 'utf-8'
+    default = FileUpload()
+    data = MultiDict()
+    counts = {}
+    errors = {}
+    try:
+        reader = _MultipartReader(request.body_file, match.group(1).encode('latin-1'), chunk_size)
+        for disposition, content_type, chunks in reader:
+            name = disposition.get('name', '').encode('latin-1').decode(charset, 'replace')
+            filename = disposition.get('filename')
+            if filename is None:
+                data.add(name, _read_field(chunks, max_field_size).decode(charset, 'replace'))
+                continue
+            if not filename:
+                # Empty file input
+                _drain(chunks)
+                data.add(name, '')
+                continue
+            filename = filename.encode('latin-1').decode(charset, 'replace')
+            validator = uploads.get(name, default)
+            counts[name] = counts.get(name, 0) + 1
+            if name in errors:
+                _drain(chunks)
+                continue
+            if counts[name] > validator.max_count:
+                _drain(chunks)
+                errors[name] = validator.too_many(filename, state)
+                continue
+            try:
+                data.add(name, validator.receive(name, filename, content_type, chunks, state))
+            except formencode.Invalid as e:
+                _drain(chunks)
+                errors[name] = e
+    except BaseException as e:
+        discard_uploads(data)
+        if isinstance(e, ValueError):
+            raise exception_response(400)
+        raise
+
+    for name, error in errors.items():
+        for handle in data.getall(name):
+            if isinstance(handle, UploadHandle):
+                handle.discard()
+        data[name] = error
+    # Make request.POST return the parsed fields
+    environ['webob._parsed_post_vars'] = (data, request.body_file_raw)
+    return data
+
+
+class _MultipartReader(object):
+    """Streaming parser of a multipart body yielding
+    ``(disposition_params, content_type, chunks)`` of each part
+    """
+    def __init__(self, stream, boundary, chunk_size):
+        self.stream = stream
+        self.delimiter = b'\r\n--' + boundary
+        self.chunk_size = chunk_size
+        # The first delimiter isn't preceded by a line break
+        self.buffer = b'\r\n'
+        self.eof = False
+
+    def _fill(self):
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+        self.buffer += data
+
+    def __iter__(self):
+        _drain(self._body())
+        while True:
+            while len(self.buffer) < 2 and not self.eof:
+                self._fill()
+            if self.buffer[:2] != b'\r\n':
+                # Closing delimiter or a truncated body
+                return
+            self.buffer = self.buffer[2:]
+            disposition, content_type = self._headers()
+            chunks = self._body()
+            yield disposition, content_type, chunks
+            _drain(chunks)
+
+    def _headers(self):
+        while True:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end >= 0:
+                break
+            if self.eof or len(self.buffer) > MAX_HEADERS_SIZE:
+                raise ValueError('Malformed multipart headers')
+            self._fill()
+        headers, self.buffer = self.buffer[:end], self.buffer[end + 4:]
+        disposition = {}
+        content_type = None
+        for line in headers.decode('latin-1').split('\r\n'):
+            key, _sep, value = line.partition(':')
+            key = key.strip().lower()
+            if key == 'content-disposition':
+                disposition = cgi.parse_header(value)[1]
+            elif key == 'content-type':
+                content_type = value.strip()
+        return disposition, content_type
+
+    def _body(self):
+        delimiter = self.delimiter
+        keep = len(delimiter) - 1
+        while True:
+            end = self.buffer.find(delimiter)
+            if end >= 0:
+                chunk, self.buffer = self.buffer[:end], self.buffer[end + len(delimiter):]
+                if chunk:
+                    yield chunk
+                return
+            if self.eof:
+                raise ValueError('Unexpected end of multipart body')
+            if len(self.buffer) > keep:
+                chunk, self.buffer = self.buffer[:-keep], self.buffer[-keep:]
+                yield chunk
+            self._fill()
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import copy
+import functools
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+import six
+import formencode
+from formencode.api import NoDefault
+from formencode.schema import format_compound_error, merge_dicts
+from pyramid.i18n import get_localizer
+
+from . import instrumentation
+from .cache import LRUCache
+
+
+
+DEFAULT_VALIDATION_THREADS = 10
+DEFAULT_VALIDATOR_CACHE_SIZE = 1024
+_validation_pool = None
+_validation_threads = DEFAULT_VALIDATION_THREADS
+_validation_pool_lock = threading.Lock()
+
+
+def set_validation_threads(size):
+    """Set the size of the thread pool of concurrent field validators.
+    Takes effect if the pool hasn't been started yet.
+    """
+    global _validation_threads
+    _validation_threads = size
+
+
+def validation_pool():
+    """Return the thread pool of concurrent field validators,
+    starting it on first use.
+    """
+    global _validation_pool
+    if _validation_pool is None:
+        with _validation_pool_lock:
+            if _validation_pool is None:
+                _validation_pool = ThreadPool(_validation_threads)
+    return _validation_pool
+
+
+class CompiledSchema(object):
+    """Flat validation plan of a :class:`pyramid_webforms.api.PrototypeSchema`
+    giving the same results. ``concurrent`` fields are validated in
+    :func:`validation_pool` threads, ``memoize`` ones are memoized.
+    """
+    def __init__(self, schema, concurrent=(), memoize=None, name=None):
+        self.schema = schema
+        self.name = name
+        self.fields = []
+        self.memoized = {}
+        memoize = memoize or {}
+        for name, validator in schema.fields.items():
+            if_missing = getattr(validator, 'if_missing', NoDefault)
+            has_missing_message = 'missing' in getattr(validator, '_messages', {})
+            to_python = validator.to_python
+            if memoize.get(name) and not getattr(validator, 'uses_request', False):
+                size = memoize[name]
+                if size is True:
+                    size = DEFAULT_VALIDATOR_CACHE_SIZE
+                to_python = self.memoized[name] = MemoizedValidator(to_python, size)
+            self.fields.append((
+                name,
+                to_python,
+                getattr(validator, 'accept_iterator', False),
+                if_missing,
+                has_missing_message and validator or None,
+                name in concurrent
+            ))
+        # Start concurrent validators first
+        self.fields.sort(key=lambda field: not field[-1])
+        self.concurrent = any(field[-1] for field in self.fields)
+        self.chained_validators = list(schema.chained_validators)
+        self.partial_validators = [
+            validator for validator in self.chained_validators
+            if (hasattr(validator, 'validate_partial')
+                and getattr(validator, 'validate_partial_form', False))
+        ]
+
+    def memo_stats(self):
+        return dict((name, memo.cache.stats()) for name, memo in self.memoized.items())
+
+    def to_python(self, value_dict, state=None):
+        schema = self.schema
+        if hasattr(value_dict, 'mixed'):
+            # Support WebOb's MultiDict
+            value_dict = value_dict.mixed()
+        if not value_dict:
+            value_dict = {}
+        elif not hasattr(value_dict, 'items'):
+            return schema.to_python(value_dict, state)
+
+        new = {}
+        errors = {}
+        pending = []
+        active = instrumentation.collector
+        if state is not None:
+            previous_key = getattr(state, 'key', None)
+            previous_full_dict = getattr(state, 'full_dict', None)
+            state.full_dict = value_dict
+        try:
+            for name, to_python, accept_iterator, if_missing, missing_validator, concurrent in self.fields:
+                if name in value_dict:
+                    value = value_dict[name]
+                    if not accept_iterator and schema._value_is_iterator(value):
+                        errors[name] = formencode.Invalid(
+                            schema.message('singleValueExpected', state), value_dict, state)
+                    if active is not None:
+                        to_python = functools.partial(
+                            _timed_convert, active, '{}.{}'.format(self.name, name), to_python)
+                    if concurrent:
+                        field_state = copy.copy(state)
+                        if field_state is not None:
+                            field_state.key = name
+                        pending.append((name, validation_pool().apply_async(
+                            _convert, (to_python, value, field_state))))
+                        continue
+                    if state is not None:
+                        state.key = name
+                    try:
+                        new[name] = to_python(value, state)
+                    except formencode.Invalid as e:
+                        errors[name] = e
+                elif if_missing is not NoDefault:
+                    new[name] = if_missing
+                else:
+                    if missing_validator is None:
+                        message = schema.message('missingValue', state)
+                    else:
+                        message = missing_validator.message('missing', state)
+                    errors[name] = formencode.Invalid(message, None, state)
+
+            for name, result in pending:
+                valid, value = result.get()
+                if valid:
+                    new[name] = value
+                else:
+                    errors[name] = value
+
+            if state is not None:
+                state.key = previous_key
+            for validator in self.partial_validators:
+                try:
+                    validator.validate_partial(value_dict, state)
+                except formencode.Invalid as e:
+                    sub_errors = e.unpack_errors()
+                    if isinstance(sub_errors, dict):
+                        merge_dicts(errors, sub_errors)
+
+            if errors:
+                raise formencode.Invalid(
+                    format_compound_error(errors),
+                    value_dict, state, error_dict=errors)
+
+            for validator in self.chained_validators:
+                new = validator.to_python(new, state)
+            return new
+
+        finally:
+            if state is not None:
+                state.key = previous_key
+                state.full_dict = previous_full_dict
+
+
+_MISS = object()
+# Input values that can be used as keys of memoized results
+_HASHABLE_TYPES = six.string_types + six.integer_types + (float, bool, type(None))
+
+
+class MemoizedValidator(object):
+    """Memoizing wrapper of ``to_python`` of a pure validator, caching
+    results by locale and input value
+    """
+    def __init__(self, to_python, size=DEFAULT_VALIDATOR_CACHE_SIZE):
+        self.to_python = to_python
+        self.cache = LRUCache(size)
+        self.enabled = True
+
+    def __call__(self, value, state):
+        if not self.enabled:
+            return self.to_python(value, state)
+        if isinstance(value, list):
+            key = tuple(value)
+            if not all(isinstance(item, _HASHABLE_TYPES) for item in key):
+                return self.to_python(value, state)
+        elif isinstance(value, _HASHABLE_TYPES):
+            key = value
+        else:
+            return self.to_python(value, state)
+
+        request = getattr(state, 'request', None)
+        key = (request is not None and get_localizer(request).locale_name, type(value), key)
+        result = self.cache.get(key, _MISS)
+        if result is not _MISS:
+            valid, result = result
+            if not valid:
+                raise formencode.Invalid(result, value, state)
+            return copy.copy(result)
+
+        tracking_state = state is not None and _TrackingState(state) or None
+        try:
+            result = self.to_python(value, tracking_state)
+        except formencode.Invalid as e:
+            if self._memoizable(tracking_state) and not e.error_list and not e.error_dict:
+                self.cache.set(key, (False, e.msg))
+            raise
+        if self._memoizable(tracking_state):
+            self.cache.set(key, (True, copy.copy(result)))
+        return result
+
+    def _memoizable(self, tracking_state):
+        if tracking_state is not None and tracking_state.reads_request:
+            self.enabled = False
+            self.cache.invalidate()
+        return self.enabled
+
+
+class _TrackingState(object):
+    """Proxy of a validation state that records reads of ``request``"""
+    def __init__(self, state):
+        self.__dict__['_state'] = state
+        self.__dict__['reads_request'] = False
+
+    def __getattr__(self, name):
+        if name == 'request':
+            self.__dict__['reads_request'] = True
+        return getattr(self._state, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._state, name, value)
+
+
+def iter_validate(form_cls, rows, state, workers=None, chunksize=100):
+    """Yield ``(index, result)`` pairs of the validated ``rows`` in order,
+    in chunks in a process pool with more than one worker
+    """
+    if not workers or workers < 2:
+        validator = form_cls._row_validator()
+        for index, row in enumerate(rows):
+            yield index, _validate_row(validator, row, state)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        pending = deque()
+        for chunk in _iter_chunks(rows, chunksize):
+            pending.append(pool.apply_async(_validate_chunk, (form_cls, chunk, state)))
+            if len(pending) >= workers * 2:
+                for item in pending.popleft().get():
+                    yield item
+        while pending:
+            for item in pending.popleft().get():
+                yield item
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def _iter_chunks(rows, chunksize):
+    chunk = []
+    for item in enumerate(rows):
+        chunk.append(item)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validate_chunk(form_cls, chunk, state):
+    # Runs in pool workers; form classes are pickled by reference
+    validator = form_cls._row_validator()
+    return [(index, _validate_row(validator, row, state)) for index, row in chunk]
+
+
+def _timed_convert(active, label, to_python, value, state):
+    started = instrumentation.clock()
+    try:
+        return to_python(value, state)
+    finally:
+        active.timing('validator', label, instrumentation.clock() - started)
+
+
+def _convert(to_python, value, state):
+    try:
+        return True, to_python(value, state)
+    except formencode.Invalid as e:
+        return False, e
+
+
+def _validate_row(validator, row, state):
+    try:
+        return validator.to_python(row, state)
+    except formencode.Invalid as e:
+        return e
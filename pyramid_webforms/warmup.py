@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import gc
+import time
+import logging
+
+from pyramid.request import Request
+from pyramid.settings import asbool
+from pyramid.threadlocal import manager
+
+from .api import form_classes
+from .i18n import configured_locales
+
+
+
+log = logging.getLogger(__name__)
+# Order of the warmup configuration action, after the default one
+WARMUP_ORDER = 10
+
+
+class _WarmupSession(dict):
+    """Session of warmup requests. Tokens aren't cached with the forms."""
+    def get_csrf_token(self):
+        return ''
+
+
+def warmup_request(registry, locale_name):
+    request = Request.blank('/')
+    request.registry = registry
+    request._LOCALE_ = locale_name
+    request.session = _WarmupSession()
+    request.tmpl_context.form_errors = {}
+    return request
+
+
+def warmup_forms(registry):
+    """Compose the schemas of all forms and render them once per locale.
+    Returns the warmup durations in seconds by form class.
+    """
+    settings = registry.settings or {}
+    locales = configured_locales(settings)
+    timings = {}
+    for form_cls in form_classes():
+        name = '{}.{}'.format(form_cls.__module__, form_cls.__name__)
+        started = time.time()
+        try:
+            form_cls._schema()
+            form_cls._compiled()
+            for locale_name in locales:
+                request = warmup_request(registry, locale_name)
+                # Translation tables are filled from the current registry
+                manager.push({'registry': registry, 'request': request})
+                try:
+                    form_cls()(request)
+                finally:
+                    manager.pop()
+        except Exception:
+            log.warning('Cannot warm up form %s', name, exc_info=True)
+            continue
+        timings[form_cls] = time.time() - started
+        log.info('Warmed up form %s in %.1f ms', name, timings[form_cls] * 1000)
+    log.info('Warmed up %d forms in %.1f ms', len(timings), sum(timings.values()) * 1000)
+
+    if asbool(settings.get('pyramid_webforms.warmup_freeze', False)):
+        gc.collect()
+        freeze = getattr(gc, 'freeze', None)
+        if freeze is None:
+            log.info('gc.freeze() is not available, skipped freezing')
+        else:
+            freeze()
+    return timings
@@ -1,11 +1,26 @@
 import unittest
 
+from pyramid import testing
+
 
 
 class TestCaseBase(unittest.TestCase):
+    settings = {}
 
     def setUp(self):
-        pass
+        self.config = testing.setUp(settings=dict(self.settings))
+        self.config.include('pyramid_webforms')
+        self.config.commit()
 
     def tearDown(self):
-        pass
+        testing.tearDown()
+
+    def make_request(self, post=None, errors=None, **kw):
+        request = testing.DummyRequest(post=post, **kw)
+        request.registry = self.config.registry
+
+        class TemplateContext(object):
+            pass
+        request.tmpl_context = TemplateContext()
+        request.tmpl_context.form_errors = errors or {}
+        return request
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from formencode import validators
+from pyramid.i18n import TranslationStringFactory
+
+from pyramid_webforms import Form
+
+
+_ = TranslationStringFactory('tests')
+
+
+class SignupForm(Form):
+    _fieldsets_ = [[_('Account'), ['login', 'email']], [['about', 'agree', 'country']]]
+    _action_ = {'name': 'home'}
+
+    login = {'type': 'text', 'title': _('Login'), 'tip': _('Your login'),
+             'validator': validators.UnicodeString(not_empty=True, max=20)}
+    email = {'type': 'text', 'title': _('Email'),
+             'validator': validators.Email(not_empty=True)}
+    about = {'type': 'textarea', 'title': 'About', 'validator': validators.UnicodeString()}
+    agree = {'type': 'checkbox', 'title': 'Agree', 'validator': validators.Bool()}
+    country = {'type': 'select', 'title': 'Country',
+               'options': [('ru', 'Russia'), ('de', 'Germany')],
+               'validator': validators.OneOf(['ru', 'de'])}
+    secret = {'type': 'hidden', 'value': 'x'}
+
+
+# Instance data and errors covering the static and dynamic parts of rows
+RENDER_CASES = [
+    ({}, {}),
+    ({'agree': {'selected': True}, 'about': {'value': 'x<y', 'class': 'big'},
+      'country': {'type': 'text'}}, {}),
+    ({'login': {'title': 'T', 'tip': '<b>t</b>', 'tip_escape': True, 'extra_html': '<i>e</i>'}},
+     {'email': 'wrong'}),
+    ({'secret': {'value': 'y'}, '_action_': '/go'}, {}),
+    ({'country': {'value': ['ru', 'de'], 'multiple': True}}, {}),
+]
+PARTS = ('all', 'attributes', 'fields', 'buttons', 'footer')
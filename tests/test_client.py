@@ -0,0 +1,64 @@
+import re
+import unittest
+
+from formencode import validators
+
+from pyramid_webforms.client import field_rules, html_attributes, _js_pattern
+
+
+def js_match(pattern, value):
+    # Browsers match the pattern attribute against the whole value
+    return re.match('^(?:{})$'.format(pattern), value) is not None
+
+
+class TestJSPattern(unittest.TestCase):
+
+    def assertSameMatches(self, regex, values):
+        regex = re.compile(regex)
+        pattern = _js_pattern(regex)
+        for value in values:
+            self.assertEqual(js_match(pattern, value), regex.search(value) is not None,
+                             (regex.pattern, pattern, value))
+
+    def test_anchored(self):
+        self.assertEqual(_js_pattern(re.compile(r'^[a-z]+$')), '(?:[a-z]+)')
+        self.assertSameMatches(r'^[a-z]+$', ['abc', 'ab1', ''])
+
+    def test_unanchored(self):
+        self.assertSameMatches(r'[0-9]', ['a1b', 'ab', ''])
+
+    def test_top_level_alternation(self):
+        values = ['a', 'b', 'ax', 'xb', 'xax', 'xbx', '']
+        self.assertSameMatches(r'^a|b$', values)
+        self.assertSameMatches(r'^a$|^b$', values)
+        self.assertEqual(_js_pattern(re.compile(r'^(a|b)$')), '(?:(a|b))')
+        self.assertEqual(_js_pattern(re.compile(r'^[a|b]$')), '(?:[a|b])')
+        self.assertEqual(_js_pattern(re.compile(r'^a\|b$')), '(?:a\\|b)')
+
+    def test_escaped_dollar(self):
+        self.assertSameMatches(r'^a\$', ['a$', 'a$b', 'a'])
+        self.assertSameMatches(r'^a\\$', ['a\\', 'a\\b'])
+
+    def test_unsupported(self):
+        self.assertEqual(_js_pattern(re.compile(r'^a$', re.I)), None)
+
+
+class TestFieldRules(unittest.TestCase):
+
+    def test_rules(self):
+        field = {'type': 'text',
+                 'validator': validators.UnicodeString(not_empty=True, max=20)}
+        rules = field_rules(field)
+        self.assertEqual(rules.rules['required'], True)
+        self.assertEqual(html_attributes(field, rules)['required'], 'required')
+
+    def test_regex(self):
+        field = {'type': 'text', 'validator': validators.Regex(r'^a|b$')}
+        self.assertEqual(field_rules(field).rules['pattern'], '[\\s\\S]*(?:^a|b$)[\\s\\S]*')
+
+    def test_unsupported(self):
+        class Custom(validators.UnicodeString):
+            def _validate_python(self, value, state):
+                pass
+        rules = field_rules({'type': 'text', 'validator': Custom()})
+        self.assertEqual(rules.unsupported, ['Custom'])
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+
+import formencode
+from formencode import validators
+from webob.multidict import MultiDict
+
+from pyramid_webforms import Form
+from pyramid_webforms.api import PrototypeSchema, FormencodeState
+from pyramid_webforms.validation import CompiledSchema
+
+
+def make_schema():
+    schema = PrototypeSchema()
+    schema.add_field('login', validators.UnicodeString(not_empty=True, max=5))
+    schema.add_field('age', validators.Int(if_missing=18))
+    schema.add_field('tags', formencode.ForEach(validators.UnicodeString()))
+    schema.add_field('password', validators.UnicodeString())
+    schema.add_field('confirm', validators.UnicodeString(if_missing=None))
+    schema.add_chained_validator(validators.FieldsMatch('password', 'confirm'))
+    return schema
+
+
+INPUTS = [
+    {},
+    {'login': 'bob', 'tags': ['a', 'b'], 'password': 'x', 'confirm': 'x'},
+    {'login': 'bob', 'tags': 'a', 'password': 'x', 'confirm': 'y'},
+    {'login': '', 'age': 'old', 'password': 'x', 'confirm': 'y'},
+    {'login': 'toolong', 'password': 'x', 'extra': 'ignored'},
+    {'login': ['a', 'b'], 'age': ['1', '2'], 'password': 'x', 'confirm': 'x'},
+    {'login': ('a',), 'password': set(['x']), 'confirm': 'x'},
+    MultiDict([('login', 'bob'), ('tags', 'a'), ('tags', 'b'), ('password', 'x'), ('confirm', 'x')]),
+    MultiDict([('login', 'a'), ('login', 'b'), ('password', 'x')]),
+]
+
+
+def outcome(validator, value, state):
+    try:
+        return 'valid', validator.to_python(value, state)
+    except formencode.Invalid as e:
+        return 'invalid', e.unpack_errors()
+
+
+class TestCompiledSchema(unittest.TestCase):
+
+    def assertSameOutcome(self, value, state=None):
+        schema = make_schema()
+        compiled = CompiledSchema(make_schema())
+        self.assertEqual(outcome(compiled, value, state), outcome(schema, value, state))
+
+    def test_inputs(self):
+        for value in INPUTS:
+            self.assertSameOutcome(value)
+
+    def test_inputs_with_state(self):
+        for value in INPUTS:
+            self.assertSameOutcome(value, FormencodeState())
+
+    def test_missing_fields_and_if_missing(self):
+        self.assertEqual(outcome(CompiledSchema(make_schema()), {}, None)[1],
+                         {'login': 'Missing value', 'password': 'Missing value'})
+        compiled = CompiledSchema(make_schema())
+        result = compiled.to_python({'login': 'bob', 'password': 'x', 'confirm': 'x'})
+        self.assertEqual((result['age'], result['tags']), (18, []))
+
+    def test_validate_partial(self):
+        # FieldsMatch reports mismatches along with the errors of fields
+        value = {'login': '', 'tags': [], 'password': 'x', 'confirm': 'y'}
+        status, errors = outcome(CompiledSchema(make_schema()), value, None)
+        self.assertEqual(status, 'invalid')
+        self.assertIn('confirm', errors)
+        self.assertIn('login', errors)
+        self.assertSameOutcome(value)
+
+    def test_state_is_restored(self):
+        state = FormencodeState()
+        state.key = 'outer'
+        state.full_dict = {'outer': 1}
+        outcome(CompiledSchema(make_schema()), INPUTS[3], state)
+        self.assertEqual((state.key, state.full_dict), ('outer', {'outer': 1}))
+
+    def test_malformed_input_is_left_to_schema(self):
+        self.assertSameOutcome('not a dict')
+
+
+class TestCompiledForm(unittest.TestCase):
+
+    def test_form_uses_compiled_schema(self):
+        class CompiledForm(Form):
+            _compiled_validation_ = True
+            login = {'type': 'text', 'validator': validators.UnicodeString(not_empty=True)}
+
+        class PlainForm(Form):
+            login = {'type': 'text', 'validator': validators.UnicodeString(not_empty=True)}
+
+        self.assertIsInstance(CompiledForm._compiled(), CompiledSchema)
+        self.assertIsNone(PlainForm._compiled())
@@ -0,0 +1,60 @@
+import time
+import threading
+
+import formencode
+from formencode import validators
+
+from pyramid_webforms import Form
+
+from tests import TestCaseBase
+
+
+class SlowLookup(validators.UnicodeString):
+    threads = set()
+
+    def _convert_to_python(self, value, state):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        if value == 'taken':
+            raise formencode.Invalid('Already taken', value, state)
+        return super(SlowLookup, self)._convert_to_python(value, state)
+
+
+class LookupForm(Form):
+    _chained_validators_ = [validators.FieldsMatch('password', 'confirm')]
+    login = {'type': 'text', 'validator': SlowLookup(), 'concurrent': True}
+    email = {'type': 'text', 'validator': SlowLookup(), 'concurrent': True}
+    password = {'type': 'password', 'validator': validators.UnicodeString()}
+    confirm = {'type': 'password', 'validator': validators.UnicodeString()}
+
+
+class TestConcurrentValidation(TestCaseBase):
+
+    def post(self, **data):
+        request = self.make_request(post=data)
+        request.POST['_at'] = request.session.get_csrf_token()
+        return request
+
+    def test_validators_run_in_pool(self):
+        started = time.time()
+        data = LookupForm.validate(self.post(login='bob', email='bob@example.com',
+                                             password='x', confirm='x'))
+        self.assertEqual((data['login'], data['email']), ('bob', 'bob@example.com'))
+        self.assertTrue(time.time() - started < 0.1)
+        self.assertNotIn(threading.current_thread().name, SlowLookup.threads)
+
+    def test_errors(self):
+        try:
+            LookupForm.validate(self.post(login='taken', email='x', password='x', confirm='x'))
+        except formencode.Invalid as e:
+            self.assertEqual(e.unpack_errors(), {'login': 'Already taken'})
+        else:
+            self.fail('Invalid not raised')
+
+    def test_chained_validators_run_after_fields(self):
+        try:
+            LookupForm.validate(self.post(login='bob', email='x', password='x', confirm='y'))
+        except formencode.Invalid as e:
+            self.assertEqual(list(e.unpack_errors()), ['confirm'])
+        else:
+            self.fail('Invalid not raised')
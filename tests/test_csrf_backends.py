@@ -0,0 +1,74 @@
+import time
+
+import formencode
+from pyramid.exceptions import ConfigurationError
+from pyramid.response import Response
+
+from pyramid_webforms.csrf import SignedCSRFBackend, SessionCSRFBackend, csrf_backend
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+VALID_DATA = {'login': 'bob', 'email': 'bob@example.com', 'about': '', 'country': 'ru'}
+
+
+class TestSignedCSRFBackend(TestCaseBase):
+
+    def setUp(self):
+        super(TestSignedCSRFBackend, self).setUp()
+        self.backend = SignedCSRFBackend('secret', timeout=60)
+
+    def request(self, nonce=None):
+        request = self.make_request()
+        if nonce is not None:
+            request.cookies['pwf_csrf'] = nonce
+        return request
+
+    def test_token_of_new_nonce(self):
+        request = self.request()
+        token = self.backend.get_token(request)
+        self.assertEqual(self.backend.get_token(request).split('-')[1], token.split('-')[1])
+        response = Response()
+        request.response_callbacks[0](request, response)
+        nonce = response.headers['Set-Cookie'].split(';')[0].split('=')[1]
+        self.assertTrue(self.backend.check(self.request(nonce), token))
+
+    def test_invalid_tokens(self):
+        token = self.backend.get_token(self.request('nonce'))
+        self.assertTrue(self.backend.check(self.request('nonce'), token))
+        self.assertFalse(self.backend.check(self.request('other'), token))
+        self.assertFalse(self.backend.check(self.request(), token))
+        self.assertFalse(self.backend.check(self.request('nonce'), 'garbage'))
+        self.assertFalse(SignedCSRFBackend('other').check(self.request('nonce'), token))
+
+    def test_expired_token(self):
+        timestamp = '{:x}'.format(int(time.time()) - 120)
+        token = '{}-{}'.format(timestamp, self.backend._sign('nonce', timestamp))
+        self.assertFalse(self.backend.check(self.request('nonce'), token))
+
+    def test_secret_is_required(self):
+        self.assertRaises(ConfigurationError, SignedCSRFBackend, '')
+
+
+class TestSignedTokenForms(TestCaseBase):
+    settings = {'pyramid_webforms.csrf_backend': 'signed',
+                'pyramid_webforms.csrf_secret': 'secret'}
+
+    def test_form_validation(self):
+        backend = csrf_backend(self.config.registry)
+        self.assertIsInstance(backend, SignedCSRFBackend)
+        request = self.make_request(post=dict(VALID_DATA))
+        request.cookies['pwf_csrf'] = 'nonce'
+        request.POST['_at'] = backend.get_token(request)
+        self.assertEqual(SignupForm.validate(request)['login'], 'bob')
+
+        request = self.make_request(post=dict(VALID_DATA, _at=request.POST['_at']))
+        request.cookies['pwf_csrf'] = 'other'
+        self.assertRaises(formencode.Invalid, SignupForm.validate, request)
+
+
+class TestSessionTokenForms(TestCaseBase):
+
+    def test_default_backend(self):
+        self.assertIsInstance(csrf_backend(self.config.registry), SessionCSRFBackend)
@@ -0,0 +1,58 @@
+from pyramid.response import Response
+
+from pyramid_webforms.csrf import csrf_substitution_tween_factory
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+USER_CONTENT = '<p>@@pwf-csrf-token@@</p>'
+
+
+class TestCSRFSubstitution(TestCaseBase):
+    settings = {'pyramid_webforms.csrf_token_mode': 'substitute'}
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        self.config.add_route('home', '/')
+        self.config.commit()
+        SignupForm.invalidate_cache()
+
+    def respond(self, body, chunks=None, **kw):
+        request = self.make_request()
+        request.session['_csrft_'] = 'token-value'
+
+        def handler(request):
+            response = Response(**kw)
+            if chunks is None:
+                response.body = body
+            else:
+                response.app_iter = iter([body[i:i + chunks]
+                                          for i in range(0, len(body), chunks)])
+            return response
+        tween = csrf_substitution_tween_factory(handler, self.config.registry)
+        return tween(request).body.decode('utf-8')
+
+    def page(self):
+        return ''.join([USER_CONTENT, SignupForm()(self.make_request())]).encode('utf-8')
+
+    def test_buffered(self):
+        body = self.respond(self.page())
+        self.assertIn('name="_at" type="hidden" value="token-value"', body)
+        self.assertIn(USER_CONTENT, body)
+
+    def test_streamed(self):
+        for size in (1, 7, 100):
+            body = self.respond(self.page(), chunks=size)
+            self.assertEqual(body, self.respond(self.page()))
+
+    def test_html_only(self):
+        page = self.page()
+        body = self.respond(page, content_type='application/json')
+        self.assertEqual(body, page.decode('utf-8'))
+        body = self.respond(page, chunks=10, content_type='text/plain')
+        self.assertEqual(body, page.decode('utf-8'))
+
+    def test_page_without_form(self):
+        self.assertEqual(self.respond(USER_CONTENT.encode('utf-8')), USER_CONTENT)
+        self.assertEqual(self.respond(USER_CONTENT.encode('utf-8'), chunks=3), USER_CONTENT)
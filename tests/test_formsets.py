@@ -0,0 +1,115 @@
+import formencode
+from formencode import validators
+from webob.multidict import MultiDict
+
+from pyramid_webforms import Form
+from pyramid_webforms.formsets import FormSet
+
+from tests import TestCaseBase
+
+
+class ProductForm(Form):
+    _fieldsets_ = [[['sku', 'price', 'active', 'category']]]
+
+    id = {'type': 'hidden', 'validator': validators.Int()}
+    sku = {'type': 'text', 'title': 'SKU',
+           'validator': validators.UnicodeString(not_empty=True, max=8)}
+    price = {'type': 'text', 'title': 'Price', 'validator': validators.Number(min=0)}
+    active = {'type': 'checkbox', 'title': 'Active', 'validator': validators.Bool()}
+    category = {'type': 'select', 'title': 'Category', 'options': [('a', 'A'), ('b', 'B')],
+                'validator': validators.OneOf(['a', 'b'])}
+
+
+ROWS = [
+    {'id': 1, 'sku': 'A<1>', 'price': 2.5, 'active': True, 'category': 'b'},
+    {'id': 2, 'sku': 'B', 'price': None, 'active': False, 'category': 'a'},
+]
+
+
+class TestFormSet(TestCaseBase):
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        self.formset = FormSet(ProductForm)
+
+    def post(self, *items):
+        request = self.make_request()
+        token = request.session.get_csrf_token()
+        return self.make_request(post=MultiDict((('_at', token),) + items))
+
+    def test_columns(self):
+        self.assertEqual(self.formset.fields, ['sku', 'price', 'active', 'category'])
+        self.assertEqual(self.formset.hidden, ['id'])
+
+    def test_filtered_form_is_reused(self):
+        self.assertIs(type(FormSet(ProductForm).form), type(self.formset.form))
+        self.assertIs(type(FormSet(ProductForm, 'other', ['sku']).form),
+                      type(self.formset.form))
+        self.assertNotIn('name="sku"', self.formset.form(self.make_request()))
+
+    def test_render(self):
+        html = self.formset(self.make_request(), ROWS)
+        self.assertIn('name="rows-0.sku"', html)
+        self.assertIn('value="A&lt;1&gt;"', html)
+        self.assertIn('name="rows-1.id" type="hidden" value="2"', html)
+        self.assertIn('<option selected="selected" value="b">B</option>', html)
+        self.assertEqual(html.count('name="_at"'), 1)
+
+    def test_iterate(self):
+        rows = ROWS * 3
+        chunks = list(self.formset.iterate(self.make_request(), iter(rows), chunk_rows=2))
+        self.assertEqual(''.join(chunks), self.formset(self.make_request(), rows))
+
+    def test_submitted(self):
+        request = self.post(('rows-1.sku', 'b'), ('rows-0.sku', 'a'), ('rows-0.category', 'a'),
+                            ('rows-x.sku', 'ignored'), ('other', 'x'))
+        self.assertEqual(self.formset.submitted(request),
+                         [{'sku': 'a', 'category': 'a'}, {'sku': 'b'}])
+
+    def test_validate(self):
+        request = self.post(('rows-0.id', '1'), ('rows-0.sku', 'x'), ('rows-0.price', '3'),
+                            ('rows-0.category', 'a'), ('rows-1.id', '2'), ('rows-1.sku', 'y'),
+                            ('rows-1.price', '1.5'), ('rows-1.active', 'on'),
+                            ('rows-1.category', 'b'))
+        results = self.formset.validate(request)
+        self.assertEqual([(row['id'], row['active']) for row in results], [(1, False), (2, True)])
+
+    def test_row_errors(self):
+        request = self.post(('rows-0.id', '1'), ('rows-0.sku', 'x'), ('rows-0.price', '3'),
+                            ('rows-0.category', 'a'), ('rows-1.id', '2'), ('rows-1.sku', ''),
+                            ('rows-1.price', 'zz'), ('rows-1.category', 'c'))
+        try:
+            self.formset.validate(request)
+        except formencode.Invalid as e:
+            errors = e.unpack_errors()
+        else:
+            self.fail('Invalid not raised')
+        self.assertEqual(errors['rows'][0], None)
+        self.assertEqual(sorted(errors['rows'][1]), ['category', 'price', 'sku'])
+        html = self.formset(self.make_request(errors=errors), self.formset.submitted(request))
+        self.assertIn('Please enter a number', html)
+
+    def test_invalid_token(self):
+        request = self.make_request(post=MultiDict([('_at', 'wrong'), ('rows-0.sku', 'x'),
+                                                    ('rows-0.category', 'a')]))
+        try:
+            self.formset.validate(request)
+        except formencode.Invalid as e:
+            self.assertIn('_at', e.unpack_errors())
+        else:
+            self.fail('Invalid not raised')
+
+    def test_unchecked_checkbox_with_value(self):
+        class TaskForm(Form):
+            _fieldsets_ = [[['title', 'done']]]
+
+            title = {'type': 'text', 'title': 'Title'}
+            done = {'type': 'checkbox', 'title': 'Done', 'value': 'yes',
+                    'validator': validators.Bool()}
+
+        formset = FormSet(TaskForm)
+        request = self.post(('rows-0.title', 'a'), ('rows-0.done', 'yes'), ('rows-1.title', 'b'))
+        html = formset(self.make_request(), formset.submitted(request))
+        self.assertEqual(html.count('checked="checked"'), 1)
+        self.assertIn('name="rows-1.done" type="checkbox" value="yes" />', html)
+        self.assertIn('checked="checked" class=" with-tip" name="rows-0.done"', html)
@@ -0,0 +1,81 @@
+import unittest
+
+from pyramid_webforms.api import fragment_cache
+from pyramid_webforms.cache import LRUCache
+
+from pyramid_webforms import Form
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+class SearchForm(Form):
+    _method_ = 'get'
+
+    query = {'type': 'text', 'title': 'Query'}
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_invalidate(self):
+        cache = LRUCache()
+        cache.set(('a', 1), 1)
+        cache.set(('b', 1), 2)
+        cache.invalidate(lambda key: key[0] == 'a')
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+class TestFragmentCache(TestCaseBase):
+
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        self.config.add_route('home', '/')
+        self.config.commit()
+        SignupForm.invalidate_cache()
+
+    def test_fragments_are_reused(self):
+        SignupForm()(self.make_request())
+        hits = fragment_cache.hits
+        SignupForm()(self.make_request())
+        self.assertTrue(fragment_cache.hits > hits)
+
+    def test_token_is_substituted_into_cached_attributes(self):
+        first = self.make_request()
+        first.session['_csrft_'] = 'first-token'
+        second = self.make_request()
+        second.session['_csrft_'] = 'second-token'
+        self.assertIn('value="first-token"', SignupForm()(first, 'attributes'))
+        output = SignupForm()(second, 'attributes')
+        self.assertIn('value="second-token"', output)
+        self.assertNotIn('first-token', output)
+
+    def test_invalidate_cache(self):
+        SignupForm()(self.make_request())
+        self.assertTrue(SignupForm._render_plans)
+        SignupForm.invalidate_cache()
+        self.assertFalse(SignupForm._render_plans)
+        self.assertFalse([key for key in fragment_cache._data
+                          if key[0].form_cls is SignupForm])
+
+    def test_get_form_attributes_are_cached(self):
+        SearchForm.invalidate_cache()
+        first = SearchForm()(self.make_request(), 'attributes')
+        keys = [key for key in fragment_cache._data
+                if key[0].form_cls is SearchForm and key[1] == 'attributes']
+        self.assertEqual(len(keys), 1)
+        self.assertTrue(fragment_cache._data[keys[0]])
+        hits = fragment_cache.hits
+        self.assertEqual(SearchForm()(self.make_request(), 'attributes'), first)
+        self.assertTrue(fragment_cache.hits > hits)
@@ -0,0 +1,56 @@
+from pyramid_webforms import instrumentation
+from pyramid_webforms.instrumentation import CallbackSink, instrumentation_tween_factory
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+METRICS = []
+
+
+def sink_factory(settings):
+    return CallbackSink(lambda metric, value, type: METRICS.append((metric, type)))
+
+
+class TestInstrumentation(TestCaseBase):
+    settings = {'pyramid_webforms.instrumentation': 'tests.test_instrumentation.sink_factory'}
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        self.config.add_route('home', '/')
+        self.config.commit()
+        del METRICS[:]
+
+    def tearDown(self):
+        instrumentation.set_collector(None)
+        TestCaseBase.tearDown(self)
+
+    def test_disabled_by_default(self):
+        instrumentation.set_collector(None)
+        SignupForm()(self.make_request())
+        self.assertEqual(METRICS, [])
+
+    def test_render_and_validate(self):
+        SignupForm()(self.make_request())
+        SignupForm._specs['login'](self.make_request())
+        request = self.make_request(post={'login': 'a', 'email': 'a@example.com',
+                                          'about': '', 'country': 'ru'})
+        request.POST['_at'] = request.session.get_csrf_token()
+        SignupForm.validate(request)
+        metrics = set(metric for metric, type in METRICS)
+        self.assertIn(('render.SignupForm.all', 'ms'), METRICS)
+        self.assertIn('validate.SignupForm', metrics)
+        self.assertIn('validator.SignupForm.login', metrics)
+        self.assertIn(('field.SignupForm.login', 'ms'), METRICS)
+        snapshot = self.config.registry.pyramid_webforms_collector.snapshot()
+        self.assertEqual(snapshot['timings']['validate.SignupForm']['count'], 1)
+
+    def test_tween(self):
+        def handler(request):
+            SignupForm()(request)
+            return 'response'
+        tween = instrumentation_tween_factory(handler, self.config.registry)
+        request = self.make_request()
+        self.assertEqual(tween(request), 'response')
+        self.assertIn('render', request.pyramid_webforms_timings)
+        self.assertIn(('request.render', 'ms'), METRICS)
@@ -0,0 +1,28 @@
+from pyramid_webforms.api import form_templates
+
+from tests import TestCaseBase
+from tests.forms import SignupForm, RENDER_CASES
+
+
+class TestIterate(TestCaseBase):
+
+    def setUp(self):
+        super(TestIterate, self).setUp()
+        self.config.add_route('home', '/')
+        self.config.commit()
+
+    def test_chunks_join_into_form(self):
+        for data, errors in RENDER_CASES:
+            chunks = list(SignupForm(dict(data)).iterate(self.make_request(errors=errors)))
+            self.assertEqual(''.join(chunks), SignupForm(dict(data))(self.make_request(errors=errors)))
+
+    def test_fieldsets_are_separate_chunks(self):
+        chunks = list(SignupForm().iterate(self.make_request()))
+        # attributes, two fieldsets, buttons and the footer
+        self.assertEqual(len([chunk for chunk in chunks if 'fieldset' in chunk]), 3)
+        self.assertTrue(chunks[-1].endswith('</form>'))
+
+    def test_without_plans(self):
+        form_templates(self.config.registry).render_plans = False
+        chunks = list(SignupForm().iterate(self.make_request()))
+        self.assertEqual(chunks, [SignupForm()(self.make_request())])
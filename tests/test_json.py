@@ -0,0 +1,53 @@
+import json
+
+import formencode
+from formencode import validators
+from pyramid.request import Request
+
+from pyramid_webforms import Form
+
+from tests import TestCaseBase
+
+
+class OrderForm(Form):
+
+    quantity = {'type': 'text', 'title': 'Quantity', 'validator': validators.Int()}
+    note = {'type': 'text', 'title': 'Note', 'validator': validators.UnicodeString()}
+    gift = {'type': 'checkbox', 'title': 'Gift', 'validator': validators.Bool()}
+    tags = {'type': 'text', 'title': 'Tags',
+            'validator': formencode.ForEach(validators.UnicodeString())}
+
+
+class TestJSONParams(TestCaseBase):
+
+    def validate(self, **values):
+        session = self.make_request().session
+        request = Request.blank('/', method='POST', body=json.dumps(values).encode('utf-8'),
+                                content_type='application/json')
+        request.headers['X-CSRF-Token'] = session.get_csrf_token()
+        request.registry = self.config.registry
+        request.session = session
+        return OrderForm.validate(request)
+
+    def errors(self, **values):
+        try:
+            self.validate(**values)
+        except formencode.Invalid as e:
+            return e.error_dict
+        self.fail('Invalid not raised')
+
+    def test_scalars_as_text(self):
+        data = self.validate(quantity=3, note=1.5, gift=True, tags=['a', 2])
+        self.assertEqual((data['quantity'], data['note'], data['gift'], data['tags']),
+                         (3, '1.5', True, ['a', '2']))
+        self.assertEqual(self.validate(quantity='3', note=True, gift=False)['gift'], False)
+
+    def test_lists_only_for_list_fields(self):
+        errors = self.errors(quantity=[1, 2], note='', tags=[])
+        self.assertEqual(list(errors), ['quantity'])
+        self.assertEqual(errors['quantity'].msg, 'Please provide only one value')
+
+    def test_objects_rejected(self):
+        errors = self.errors(quantity=1, note={'a': 1}, tags={'a': 1})
+        self.assertEqual(sorted(errors), ['note', 'tags'])
+        self.assertEqual(errors['note'].msg, 'Please provide only one value')
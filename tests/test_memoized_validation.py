@@ -0,0 +1,56 @@
+import formencode
+from formencode import validators
+
+from pyramid_webforms import Form
+
+from tests import TestCaseBase
+
+
+class CountingValidator(validators.Int):
+    calls = 0
+
+    def _convert_to_python(self, value, state):
+        CountingValidator.calls += 1
+        return super(CountingValidator, self)._convert_to_python(value, state)
+
+
+class RequestValidator(validators.UnicodeString):
+    calls = 0
+
+    def _convert_to_python(self, value, state):
+        RequestValidator.calls += 1
+        state.request
+        return value
+
+
+class MemoForm(Form):
+    number = {'type': 'text', 'validator': CountingValidator(), 'cache': True}
+    name = {'type': 'text', 'validator': RequestValidator(), 'cache': 10}
+
+
+class TestMemoizedValidation(TestCaseBase):
+
+    def validate(self, **data):
+        request = self.make_request(post=data)
+        request.POST['_at'] = request.session.get_csrf_token()
+        return MemoForm.validate(request)
+
+    def test_results_are_cached(self):
+        CountingValidator.calls = 0
+        self.assertEqual(self.validate(number='5', name='a')['number'], 5)
+        hits = MemoForm.validator_cache_stats()['number']['hits']
+        self.assertEqual(self.validate(number='5', name='a')['number'], 5)
+        self.assertEqual(CountingValidator.calls, 1)
+        self.assertEqual(MemoForm.validator_cache_stats()['number']['hits'], hits + 1)
+
+    def test_errors_are_cached(self):
+        CountingValidator.calls = 0
+        for attempt in range(2):
+            self.assertRaises(formencode.Invalid, self.validate, number='bad', name='a')
+        self.assertEqual(CountingValidator.calls, 1)
+
+    def test_validators_reading_request_are_not_memoized(self):
+        RequestValidator.calls = 0
+        self.validate(number='1', name='b')
+        self.validate(number='1', name='b')
+        self.assertEqual(RequestValidator.calls, 2)
@@ -0,0 +1,50 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyramid_webforms.modules import ModuleNames
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+MODULE_DIR = tempfile.mkdtemp(prefix='pwf-modules-')
+
+
+class TestModuleNames(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='pwf-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_named_after_source(self):
+        names = ModuleNames('/modules')
+        template = os.path.join(self.directory, 'form.p_wf_mako')
+        with io.open(template, 'w') as f:
+            f.write(u'<form/>')
+        first = names(template, '/form.p_wf_mako')
+        self.assertTrue(first.startswith('/modules/form.p_wf_mako-'))
+        self.assertEqual(names(template, '/form.p_wf_mako'), first)
+        with io.open(template, 'w') as f:
+            f.write(u'<form></form>')
+        self.assertNotEqual(names(template, '/form.p_wf_mako'), first)
+
+
+class TestModuleDirectory(TestCaseBase):
+    settings = {'pyramid_webforms.module_directory': MODULE_DIR}
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MODULE_DIR, ignore_errors=True)
+
+    def test_modules_written(self):
+        self.config.add_route('home', '/')
+        self.config.commit()
+        SignupForm.invalidate_cache()
+        SignupForm()(self.make_request())
+        modules = [name for name in os.listdir(MODULE_DIR) if name.endswith('.py')]
+        self.assertTrue(any(name.startswith('pyramid_webforms_templates_form.p_wf_mako-') for name in modules), modules)
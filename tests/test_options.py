@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from formencode import validators
+from pyramid.i18n import make_localizer
+
+from pyramid_webforms import Form
+from pyramid_webforms.options import OptionsSource
+
+from tests import TestCaseBase
+from tests.forms import _
+
+
+LOCALE_DIR = os.path.join(os.path.dirname(__file__), 'locale')
+COLORS = [('red', 'Red'), ('blue', 'Blue')]
+
+
+class ColorForm(Form):
+    _fieldsets_ = [[['color']]]
+    _method_ = 'get'
+
+    color = {'type': 'select', 'title': 'Color',
+             'options': OptionsSource(lambda: list(COLORS)),
+             'validator': validators.UnicodeString()}
+
+
+class TestOptionsSource(unittest.TestCase):
+
+    def test_selected_values(self):
+        source = OptionsSource([(1, 'One'), (2, 'Two'), ('', 'None')])
+        self.assertIn('<option selected="selected" value="1">One</option>', source.render(1))
+        self.assertIn('<option selected="selected" value="2">Two</option>', source.render('2'))
+        self.assertIn('<option selected="selected" value="">None</option>', source.render(None))
+        html = source.render([1, '2'])
+        self.assertIn('<option selected="selected" value="1">', html)
+        self.assertIn('<option selected="selected" value="2">', html)
+        self.assertNotIn('selected', source.render(3))
+
+    def test_translated_per_locale(self):
+        source = OptionsSource([('a', _('Account'))], translate=True)
+        de = make_localizer('de', [LOCALE_DIR])
+        en = make_localizer('en', [LOCALE_DIR])
+        self.assertIn('>Konto<', source.render('a', de))
+        self.assertIn('>Account<', source.render('a', en))
+        self.assertIn('>Account<', source.render('a'))
+        self.assertIn('>Konto<', source.render('a', de))
+
+
+class TestLoadedOptions(TestCaseBase):
+
+    def tearDown(self):
+        COLORS[:] = [('red', 'Red'), ('blue', 'Blue')]
+        TestCaseBase.tearDown(self)
+
+    def test_fields_not_cached(self):
+        self.assertIn('>Blue<', ColorForm()(self.make_request(), 'fields'))
+        COLORS.append(('green', 'Green'))
+        ColorForm._specs['color'].kw['options'].invalidate()
+        self.assertIn('>Green<', ColorForm()(self.make_request(), 'fields'))
@@ -0,0 +1,38 @@
+from pyramid.i18n import get_localizer
+
+from pyramid_webforms.api import form_templates
+
+from tests import TestCaseBase
+from tests.forms import SignupForm, RENDER_CASES, PARTS
+
+
+class TestRenderPlans(TestCaseBase):
+
+    def setUp(self):
+        super(TestRenderPlans, self).setUp()
+        self.config.add_route('home', '/')
+        self.config.commit()
+
+    def render_all(self):
+        output = []
+        for data, errors in RENDER_CASES:
+            for part in PARTS:
+                request = self.make_request(errors=errors)
+                output.append(SignupForm(dict(data))(request, part))
+        return output
+
+    def test_plans_render_as_templates(self):
+        compiled = self.render_all()
+        form_templates(self.config.registry).render_plans = False
+        self.assertEqual(compiled, self.render_all())
+
+    def test_plans_are_compiled_per_locale(self):
+        request = self.make_request()
+        SignupForm()(request)
+        plans = SignupForm._render_plans
+        self.assertIn(('en', form_templates(self.config.registry)), plans)
+
+    def test_disabled_plans(self):
+        form_templates(self.config.registry).render_plans = False
+        request = self.make_request()
+        self.assertIsNone(SignupForm._render_plan(request, get_localizer(request)))
@@ -0,0 +1,60 @@
+from pyramid_webforms.api import FieldError, row_cache
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+ERRORS = {'login': 'Please enter a value', 'email': 'An email address must contain a single @'}
+DATA = {'login': {'value': 'x<y'}, 'country': {'value': 'de'}}
+
+
+class RowCacheTestBase(TestCaseBase):
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        self.config.add_route('home', '/')
+        self.config.commit()
+        SignupForm.invalidate_cache()
+
+    def render(self, part='all'):
+        return SignupForm(DATA)(self.make_request(errors=dict(ERRORS)), part)
+
+
+class TestRowCache(RowCacheTestBase):
+
+    def test_rows_are_reused(self):
+        first = self.render()
+        hits = row_cache.hits
+        self.assertEqual(self.render(), first)
+        self.assertTrue(row_cache.hits > hits)
+
+    def test_invalidate(self):
+        self.render()
+        self.assertTrue(len(row_cache))
+        SignupForm.invalidate_cache()
+        self.assertEqual(len(row_cache), 0)
+
+    def test_field_part(self):
+        fields = self.render('fields')
+        for name in ('login', 'email', 'country'):
+            row = self.render('field:' + name)
+            self.assertIn(row, fields)
+        self.assertIn('x&lt;y', self.render('field:login'))
+        self.assertIn(ERRORS['email'], self.render('field:email'))
+
+    def test_unknown_field(self):
+        self.assertRaises(FieldError, self.render, 'field:unknown')
+
+
+class TestRowCacheDisabled(RowCacheTestBase):
+    settings = {'pyramid_webforms.row_cache_size': '0'}
+
+    def test_same_output(self):
+        html = self.render()
+        self.assertEqual(len(row_cache), 0)
+        row_cache.resize(16)
+        try:
+            self.assertEqual(self.render(), html)
+            self.assertEqual(self.render(), html)
+        finally:
+            row_cache.resize(0)
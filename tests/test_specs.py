@@ -0,0 +1,60 @@
+import unittest
+
+from formencode import validators
+
+from pyramid_webforms import Form
+from pyramid_webforms.api import InputField, FieldError
+
+
+class TestInputField(unittest.TestCase):
+
+    def test_override_leaves_spec_unchanged(self):
+        spec = InputField(type='text', name='login', value='a', size=10)
+        field = spec.override({'value': 'b', 'size': 20, 'validator': validators.Int()})
+        self.assertEqual((spec.value, spec.kw['size']), ('a', 10))
+        self.assertEqual((field.value, field.kw['size']), ('b', 20))
+        self.assertNotIn('validator', field.kw)
+
+    def test_override_without_data(self):
+        spec = InputField(type='text', name='login')
+        self.assertIs(spec.override({}), spec)
+
+    def test_override_type(self):
+        spec = InputField(type='select', name='country', options=[('a', 'A')])
+        field = spec.override({'type': 'text', 'value': 'x'})
+        self.assertEqual(field.type, 'text')
+        self.assertIn('value="x"', field.input())
+
+    def test_unsupported_type(self):
+        self.assertRaises(FieldError, InputField, type='unknown')
+
+
+class TestFormSpecs(unittest.TestCase):
+
+    def test_specs_are_compiled_per_class(self):
+        class LoginForm(Form):
+            login = {'type': 'text', 'title': 'Login', 'validator': validators.UnicodeString()}
+        spec = LoginForm._specs['login']
+        self.assertIsInstance(spec, InputField)
+        self.assertEqual((spec.name, spec.title), ('login', 'Login'))
+        self.assertIs(LoginForm()._specs['login'], spec)
+
+    def test_specs_are_reused_by_subclasses(self):
+        class LoginForm(Form):
+            login = {'type': 'text', 'title': 'Login', 'validator': validators.UnicodeString()}
+
+        class SubForm(LoginForm):
+            pass
+
+        self.assertIs(SubForm._specs['login'], LoginForm._specs['login'])
+
+    def test_subclass_toggling_with_tip(self):
+        class LoginForm(Form):
+            login = {'type': 'text', 'title': 'Login', 'validator': validators.UnicodeString()}
+
+        class NoTipForm(LoginForm):
+            _with_tip_ = False
+
+        self.assertIn('with-tip', LoginForm._specs['login'].input())
+        self.assertNotIn('with-tip', NoTipForm._specs['login'].input())
+        self.assertIn('with-tip', LoginForm._specs['login'].input())
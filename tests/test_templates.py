@@ -0,0 +1,29 @@
+from pyramid_webforms.api import form_templates
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+class TestFormTemplates(TestCaseBase):
+    settings = {'pyramid_webforms.submit_tpl': 'tests:templates/submit.p_wf_mako'}
+
+    def setUp(self):
+        super(TestFormTemplates, self).setUp()
+        self.config.add_route('home', '/')
+        self.config.commit()
+
+    def test_templates_are_bound_once(self):
+        templates = form_templates(self.config.registry)
+        self.assertIs(templates, form_templates(self.config.registry))
+        self.assertIsNotNone(templates.templates['field'])
+
+    def test_overridden_template(self):
+        buttons = SignupForm()(self.make_request(), 'buttons')
+        self.assertEqual(buttons, '<button type="submit">Submit</button>')
+
+    def test_reload_templates(self):
+        self.config.registry.settings['pyramid.reload_templates'] = 'true'
+        templates = type(form_templates(self.config.registry))(self.config.registry)
+        self.assertIsNone(templates.templates['field'])
+        self.assertIn('Submit', templates.render(self.make_request(), 'submit',
+                                                 {'form_submit_text': 'Submit'}))
@@ -0,0 +1,66 @@
+import copy
+import random
+import threading
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+DATA = [
+    {},
+    {'login': {'value': 'shared'}},
+    {'about': {'value': 'x<y'}, 'country': {'value': 'de'}},
+]
+PARTS = ('all', 'fields', 'attributes', 'buttons', 'iterate')
+
+
+class TestSharedInstances(TestCaseBase):
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        self.config.add_route('home', '/')
+        self.config.commit()
+        SignupForm.invalidate_cache()
+
+    def render(self, form, token, errors, part):
+        request = self.make_request(errors=dict(errors))
+        request.session['_csrft_'] = token
+        if part == 'iterate':
+            return ''.join(form.iterate(request))
+        output = form(request, part)
+        # Parts are prepared once per request
+        self.assertEqual(form(request, part), output)
+        return output
+
+    def test_concurrent_renders(self):
+        cases = []
+        for index in range(30):
+            errors = index % 3 and (('email', 'bad {}'.format(index)),) or ()
+            cases.append((index % len(DATA), 'token{:04d}'.format(index), errors,
+                          PARTS[index % len(PARTS)]))
+        expected = dict(
+            (case, self.render(SignupForm(copy.deepcopy(DATA[case[0]])), *case[1:]))
+            for case in cases
+        )
+        shared = [SignupForm(copy.deepcopy(data)) for data in DATA]
+        failures = []
+
+        def worker(seed):
+            rnd = random.Random(seed)
+            for _ in range(100):
+                case = rnd.choice(cases)
+                try:
+                    output = self.render(shared[case[0]], *case[1:])
+                except Exception as e:
+                    failures.append((case, e))
+                    continue
+                if output != expected[case]:
+                    failures.append((case, output))
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        self.assertEqual([form.data for form in shared], DATA)
@@ -0,0 +1,31 @@
+from pyramid.i18n import get_localizer
+from pyramid.interfaces import ILocalizer
+
+from pyramid_webforms.api import SUBMIT_TEXT
+from pyramid_webforms.i18n import translate, translation_table, _key
+
+from tests import TestCaseBase
+from tests.forms import _
+
+
+class TestTranslations(TestCaseBase):
+    settings = {'pyramid.default_locale_name': 'de'}
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        # Added by the application after including pyramid_webforms
+        self.config.add_translation_dirs('tests:locale/')
+        self.config.commit()
+
+    def test_no_localizer_registered(self):
+        self.assertEqual(self.config.registry.queryUtility(ILocalizer, name='de'), None)
+
+    def test_late_translation_dirs(self):
+        localizer = get_localizer(self.make_request())
+        self.assertEqual(translate(localizer, _('Account')), 'Konto')
+        # Form strings are in the table before they are looked up
+        table = translation_table(localizer)
+        self.assertEqual(table[_key(_('Login'))], 'Anmeldung')
+        self.assertEqual(translate(localizer, _('Login')), 'Anmeldung')
+        # Fixed strings of the package
+        self.assertEqual(translate(localizer, SUBMIT_TEXT), 'Absenden')
@@ -0,0 +1,77 @@
+from pyramid.httpexceptions import HTTPForbidden, HTTPRequestEntityTooLarge
+from pyramid.request import Request
+
+from pyramid_webforms.api import authenticate_form
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+BOUNDARY = 'xyz'
+
+
+def multipart(*parts):
+    body = []
+    for name, value, filename in parts:
+        disposition = 'form-data; name="{}"'.format(name)
+        if filename:
+            disposition += '; filename="{}"'.format(filename)
+        body.append('--{}\r\nContent-Disposition: {}\r\n\r\n{}\r\n'.format(
+            BOUNDARY, disposition, value))
+    body.append('--{}--\r\n'.format(BOUNDARY))
+    return ''.join(body).encode('utf-8')
+
+
+@authenticate_form
+def plain_view(context, request):
+    return request.POST['file'].value
+
+
+@authenticate_form(form=SignupForm)
+def early_view(context, request):
+    return request.POST['file'].value
+
+
+@authenticate_form(max_size=100)
+def limited_view(context, request):
+    return request.POST['file'].value
+
+
+class TestUploadCSRF(TestCaseBase):
+
+    def request(self, body):
+        request = Request.blank('/', method='POST', body=body,
+                                content_type='multipart/form-data; boundary=' + BOUNDARY)
+        request.registry = self.config.registry
+        request.session = self.make_request().session
+        return request
+
+    def token(self):
+        return self.make_request().session.get_csrf_token()
+
+    def test_token_before_file(self):
+        body = multipart(('_at', self.token(), None), ('file', 'data', 'a.txt'))
+        self.assertEqual(early_view(None, self.request(body)), b'data')
+        self.assertEqual(plain_view(None, self.request(body)), b'data')
+
+    def test_token_after_file(self):
+        body = multipart(('file', 'x' * 20000, 'a.txt'), ('_at', self.token(), None))
+        # The early check is opt-in
+        self.assertEqual(plain_view(None, self.request(body)), b'x' * 20000)
+        self.assertRaises(HTTPForbidden, early_view, None, self.request(body))
+
+    def test_forged_upload(self):
+        body = multipart(('_at', 'forged', None), ('file', 'data', 'a.txt'))
+        request = self.request(body)
+        self.assertRaises(HTTPForbidden, early_view, None, request)
+        self.assertNotIn('webob._parsed_post_vars', request.environ)
+        self.assertRaises(HTTPForbidden, plain_view, None, self.request(body))
+
+    def test_max_size(self):
+        body = multipart(('_at', self.token(), None), ('file', 'x' * 200, 'a.txt'))
+        self.assertRaises(HTTPRequestEntityTooLarge, limited_view, None, self.request(body))
+
+    def test_early_check_setting(self):
+        self.config.registry.settings['pyramid_webforms.early_upload_check'] = 'true'
+        body = multipart(('file', 'x' * 20000, 'a.txt'), ('_at', self.token(), None))
+        self.assertRaises(HTTPForbidden, plain_view, None, self.request(body))
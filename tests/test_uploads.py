@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+
+import formencode
+from pyramid.httpexceptions import HTTPRequestEntityTooLarge
+from pyramid.request import Request
+
+from pyramid_webforms.api import Form, authenticate_form
+from pyramid_webforms.uploads import FileUpload, UploadHandle
+
+from tests import TestCaseBase
+from tests.test_upload_csrf import BOUNDARY, multipart
+
+
+TARGET_DIR = tempfile.mkdtemp(prefix='pwf-test-')
+
+
+class UploadForm(Form):
+    title = {'type': 'text', 'title': 'Title',
+             'validator': formencode.validators.UnicodeString(not_empty=True)}
+    file = {'type': 'file', 'title': 'File',
+            'validator': FileUpload(max_size=1000, target_dir=TARGET_DIR)}
+
+
+@authenticate_form(form=UploadForm)
+def upload_view(context, request):
+    return UploadForm.validate(request)
+
+
+class TestUploads(TestCaseBase):
+
+    def tearDown(self):
+        for name in os.listdir(TARGET_DIR):
+            os.unlink(os.path.join(TARGET_DIR, name))
+        TestCaseBase.tearDown(self)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TARGET_DIR, ignore_errors=True)
+
+    def request(self, *parts):
+        session = self.make_request().session
+        parts = (('_at', session.get_csrf_token(), None),) + parts
+        request = Request.blank('/', method='POST', body=multipart(*parts),
+                                content_type='multipart/form-data; boundary=' + BOUNDARY)
+        request.registry = self.config.registry
+        request.session = session
+        return request
+
+    def test_upload(self):
+        data = UploadForm.validate(self.request(('title', 'a', None), ('file', 'data', 'a.txt')))
+        handle = data['file']
+        self.assertTrue(isinstance(handle, UploadHandle))
+        self.assertEqual((handle.filename, handle.size), ('a.txt', 4))
+        self.assertEqual(os.listdir(TARGET_DIR), [os.path.basename(handle.path)])
+        # The caller owns the handles of a valid form
+        handle.discard()
+        self.assertEqual(os.listdir(TARGET_DIR), [])
+
+    def test_too_large(self):
+        request = self.request(('title', 'a', None), ('file', 'x' * 2000, 'a.txt'))
+        self.assertRaises(formencode.Invalid, UploadForm.validate, request)
+        self.assertEqual(os.listdir(TARGET_DIR), [])
+
+    def test_discarded_if_invalid(self):
+        request = self.request(('title', '', None), ('file', 'data', 'a.txt'))
+        try:
+            UploadForm.validate(request)
+        except formencode.Invalid as e:
+            self.assertEqual(list(e.error_dict), ['title'])
+        else:
+            self.fail('Invalid not raised')
+        self.assertEqual(os.listdir(TARGET_DIR), [])
+
+    def test_rejected_values_left_out_of_post(self):
+        request = self.request(('title', '', None), ('file', 'data', 'a.txt'),
+                               ('file', 'x' * 2000, 'b.txt'))
+        self.assertRaises(formencode.Invalid, UploadForm.validate, request)
+        self.assertEqual(request.POST.getall('file'), [''])
+        self.assertEqual(os.listdir(TARGET_DIR), [])
+
+    def test_decorated_view(self):
+        request = self.request(('title', 'a', None), ('file', 'data', 'a.txt'))
+        data = upload_view(None, request)
+        # The body was streamed by validate, not buffered by WebOb
+        self.assertTrue(isinstance(request.POST['file'], UploadHandle))
+        self.assertEqual(os.path.dirname(data['file'].path), TARGET_DIR)
+        data['file'].discard()
+
+    def test_field_size(self):
+        request = self.request(('file', 'data', 'a.txt'), ('title', 'x' * 300000, None))
+        self.assertRaises(HTTPRequestEntityTooLarge, UploadForm.validate, request)
+        self.assertEqual(os.listdir(TARGET_DIR), [])
+
+
+class TestFieldSizeSetting(TestCaseBase):
+    settings = {'pyramid_webforms.max_field_size': '10'}
+
+    def test_setting(self):
+        request = Request.blank('/', method='POST', body=multipart(('title', 'x' * 11, None)),
+                                content_type='multipart/form-data; boundary=' + BOUNDARY)
+        request.registry = self.config.registry
+        self.assertRaises(HTTPRequestEntityTooLarge, UploadForm.validate, request)
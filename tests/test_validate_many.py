@@ -0,0 +1,28 @@
+import unittest
+
+import formencode
+
+from tests.forms import SignupForm
+
+
+ROWS = [
+    {'login': 'bob', 'email': 'bob@example.com', 'country': 'ru', 'about': ''},
+    {'login': '', 'email': 'nope', 'country': 'de', 'about': ''},
+    {'login': 'eve', 'email': 'eve@example.com', 'country': 'de', 'agree': '1', 'about': ''},
+]
+
+
+class TestValidateMany(unittest.TestCase):
+
+    def check(self, results):
+        self.assertEqual([index for index, result in results], [0, 1, 2])
+        self.assertEqual(results[0][1]['login'], 'bob')
+        self.assertIsInstance(results[1][1], formencode.Invalid)
+        self.assertEqual(sorted(results[1][1].unpack_errors()), ['email', 'login'])
+        self.assertTrue(results[2][1]['agree'])
+
+    def test_rows_without_csrf_token(self):
+        self.check(list(SignupForm.validate_many(iter(ROWS))))
+
+    def test_process_pool(self):
+        self.check(list(SignupForm.validate_many(ROWS, workers=2, chunksize=1)))
@@ -0,0 +1,28 @@
+from pyramid_webforms.warmup import warmup_forms
+
+from tests import TestCaseBase
+from tests.forms import SignupForm
+
+
+class TestWarmup(TestCaseBase):
+    settings = {'pyramid_webforms.warmup': 'true',
+                'pyramid_webforms.locales': 'en de'}
+
+    def setUp(self):
+        TestCaseBase.setUp(self)
+        SignupForm.invalidate_cache()
+
+    def test_skips_failing_forms(self):
+        # The action route of the form doesn't exist
+        self.assertNotIn(SignupForm, warmup_forms(self.config.registry))
+
+    def test_renders_per_locale(self):
+        self.config.add_route('home', '/')
+        self.config.commit()
+        timings = warmup_forms(self.config.registry)
+        self.assertIn(SignupForm, timings)
+        self.assertEqual(sorted(locale for locale, templates in SignupForm._render_plans),
+                         ['de', 'en'])
+        hits = SignupForm.cache_stats()['hits']
+        SignupForm()(self.make_request())
+        self.assertTrue(SignupForm.cache_stats()['hits'] > hits)